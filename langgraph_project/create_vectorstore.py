@@ -1,15 +1,27 @@
+import hashlib
 import os
 from langchain_chroma import Chroma
-from langchain_community.document_loaders import TextLoader
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
+from .embeddings import EMBEDDING_MODEL_NAME, get_embeddings
 
 # --- Configuration ---
 KNOWLEDGE_BASE_DIR = "knowledge_base"
 VECTORSTORE_DIR = "vectorstore"
-# Using a local, open-source embedding model
-EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# Chunks per collection.add() call; stays under Chroma's max batch size
+INSERT_BATCH_SIZE = 5000
+# Chunk sizes in tokens, counted without special tokens; with the [CLS] and [SEP] the
+# model adds, 254 fills MiniLM's 256-token window exactly, so nothing is truncated
+CHUNK_TOKENS = 254
+CHUNK_OVERLAP_TOKENS = 32
+# HNSW index settings for the 384-dim normalized MiniLM vectors; only applied when the
+# collection is first created, so rebuild the vectorstore directory to change them
+COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 12,
+    "hnsw:construction_ef": 100,
+    "hnsw:search_ef": 64,
+}
 
 def create_vectorstore():
     """
@@ -17,48 +29,76 @@ def create_vectorstore():
     """
     print("--- Creating vector store ---")
     
-    # 1. Load documents manually
-    documents = []
-    knowledge_files = [f for f in os.listdir(KNOWLEDGE_BASE_DIR) if f.endswith('.md')]
-    
-    for filename in knowledge_files:
-        filepath = os.path.join(KNOWLEDGE_BASE_DIR, filename)
-        print(f"Loading: {filepath}")
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-                doc = Document(page_content=content, metadata={"source": filename})
-                documents.append(doc)
-                print(f"✅ Loaded {filename} ({len(content)} characters)")
-        except Exception as e:
-            print(f"❌ Error loading {filename}: {e}")
+    # 1. Load documents in parallel; decode as UTF-8 directly instead of probing encodings
+    loader = DirectoryLoader(
+        KNOWLEDGE_BASE_DIR,
+        glob="*.md",
+        loader_cls=TextLoader,
+        loader_kwargs={"encoding": "utf-8", "autodetect_encoding": False},
+        use_multithreading=True,
+        max_concurrency=min(32, (os.cpu_count() or 1) * 2),
+        silent_errors=True,
+    )
+    documents = loader.load()
+    for doc in documents:
+        doc.metadata["source"] = os.path.basename(doc.metadata["source"])
+        print(f"✅ Loaded {doc.metadata['source']} ({len(doc.page_content)} characters)")
     
     if not documents:
         print("No documents found in the knowledge base.")
         return
 
-    # 2. Split documents into chunks
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    splits = text_splitter.split_documents(documents)
-
-    # 3. Create embeddings
+    # 2. Split documents into chunks measured in embedding-model tokens; the model is the
+    # one search uses, so stored and query vectors come from the same EMBEDDING_BACKEND
     print(f"Loading embedding model: {EMBEDDING_MODEL_NAME}")
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+    embeddings = get_embeddings()
+    text_splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+        embeddings.model.tokenizer,
+        chunk_size=CHUNK_TOKENS,
+        chunk_overlap=CHUNK_OVERLAP_TOKENS
+    )
+    splits = text_splitter.split_documents(documents)
 
-    # 4. Create and persist the vector store
+    # 3. Open (or create) the persistent vector store
     print(f"Creating vector store in directory: {VECTORSTORE_DIR}")
     if not os.path.exists(VECTORSTORE_DIR):
         os.makedirs(VECTORSTORE_DIR)
-        
-    vectorstore = Chroma.from_documents(
-        documents=splits,
-        embedding=embeddings,
-        persist_directory=VECTORSTORE_DIR
+
+    vectorstore = Chroma(
+        persist_directory=VECTORSTORE_DIR,
+        embedding_function=embeddings,
+        collection_metadata=COLLECTION_METADATA
     )
-    
+
+    # 4. Embed and insert in large batches, keyed by content hash so re-runs skip known chunks
+    chunks = {}
+    for doc in splits:
+        chunk_id = hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+        chunks.setdefault(chunk_id, doc)
+    ids = list(chunks)
+
+    added = 0
+    for i in range(0, len(ids), INSERT_BATCH_SIZE):
+        batch_ids = ids[i:i + INSERT_BATCH_SIZE]
+        existing = set(vectorstore._collection.get(ids=batch_ids, include=[])["ids"])
+        new_ids = [chunk_id for chunk_id in batch_ids if chunk_id not in existing]
+        if not new_ids:
+            continue
+
+        texts = [chunks[chunk_id].page_content for chunk_id in new_ids]
+        # add_texts() would embed again, so hand the precomputed vectors to the collection
+        vectorstore._collection.add(
+            ids=new_ids,
+            embeddings=embeddings.encode(texts, show_progress_bar=True).tolist(),
+            documents=texts,
+            metadatas=[chunks[chunk_id].metadata for chunk_id in new_ids]
+        )
+        added += len(new_ids)
+
     print("--- Vector store created successfully! ---")
     print(f"Total documents processed: {len(documents)}")
     print(f"Total chunks created: {len(splits)}")
+    print(f"New chunks added: {added} (skipped {len(ids) - added} already stored)")
     print(f"Vector store saved to: {VECTORSTORE_DIR}")
     
     # Test the vector store
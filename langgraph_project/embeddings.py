@@ -0,0 +1,86 @@
+import os
+import threading
+import torch
+from typing import List
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
+
+# Using a local, open-source embedding model
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ENCODE_BATCH_SIZE = 128
+GPU_ENCODE_BATCH_SIZE = 256
+# Set EMBEDDING_BACKEND=torch-int8 to run the model with dynamic INT8 weights on CPU, or
+# onnx-int8 for the published INT8 ONNX export (needs `pip install sentence-transformers[onnx]`).
+# Ingestion and search read the same variable, so the knowledge base is always queried
+# with the backend that built it.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_INT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    Thin LangChain wrapper that batch-encodes texts with a SentenceTransformer.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, batch_size: int = None,
+                 backend: str = EMBEDDING_BACKEND):
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        if backend == "onnx-int8":
+            # Pre-quantized ONNX graph; it is already INT8, so the torch paths below do not apply
+            self.device = "cpu"
+            self.model = SentenceTransformer(
+                model_name, device=self.device, backend="onnx",
+                model_kwargs={"file_name": ONNX_INT8_FILE}
+            )
+        else:
+            self.model = SentenceTransformer(model_name, device=self.device)
+            if self.device == "cuda":
+                # FP16 weights run the matmuls on tensor cores and halve memory traffic
+                self.model.half()
+        self.batch_size = batch_size or (GPU_ENCODE_BATCH_SIZE if self.device == "cuda" else ENCODE_BATCH_SIZE)
+        if backend == "torch-int8":
+            self._quantize()
+
+    def _quantize(self):
+        """Swap the transformer's Linear layers for dynamic INT8 versions (CPU only)."""
+        if self.device != "cpu":
+            print("⚠️ INT8 quantization is CPU-only, keeping the FP16 GPU model")
+            return
+        torch.ao.quantization.quantize_dynamic(
+            self.model._first_module().auto_model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+        print("✅ Quantized embedding model to INT8")
+
+    def encode(self, texts: List[str], show_progress_bar: bool = False):
+        # encode() sorts the inputs by length before batching, so every batch
+        # is only padded up to its own longest member.
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            show_progress_bar=show_progress_bar,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+
+def get_embeddings() -> SentenceTransformerEmbeddings:
+    """
+    Returns the process-wide embedding model, loading it once even when
+    several threads ask for it at the same time.
+    """
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                _embeddings = SentenceTransformerEmbeddings()
+    return _embeddings
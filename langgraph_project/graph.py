@@ -1,7 +1,11 @@
+import logging
+from functools import lru_cache
 from langgraph.graph import StateGraph, END
 from .state import AgentState
-from .nodes.example_node import planner_node, researcher_node, writer_node, tool_node
-from langchain_core.messages import BaseMessage
+from .nodes.example_node import planner_node, researcher_node, writer_node, tool_node, RESEARCH_TOOLS
+from langchain_core.messages import AIMessage
+
+logger = logging.getLogger(__name__)
 
 
 def route_after_researcher(state: AgentState) -> str:
@@ -11,33 +15,37 @@ def route_after_researcher(state: AgentState) -> str:
     Otherwise, we have a final answer and can proceed to the writer.
     """
     last_message = state['messages'][-1]
-    if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
+    if isinstance(last_message, AIMessage) and last_message.tool_calls:
         # If the last message was a tool call, execute the tool.
-        print("---DECISION: EXECUTING TOOL---")
+        logger.info("---DECISION: EXECUTING TOOL---")
         return "tool"
     else:
         # Otherwise, the LLM has responded with a final answer.
-        print("---DECISION: PROCEEDING TO WRITER---")
+        logger.info("---DECISION: PROCEEDING TO WRITER---")
         return "writer"
 
 
 def route_after_tool(state: AgentState) -> str:
     """
     Decision node after tool execution.
-    Checks if the maximum iteration count has been reached.
-    If so, it proceeds to the writer. Otherwise, it returns to the researcher.
+    Proceeds to the writer once both the knowledge base and the web have been
+    searched, or when the maximum iteration count has been reached.
+    Otherwise, it returns to the researcher.
     """
     # Check the iteration count
     count = state.get('iteration_count', 0)
-    print(f"🔄 Iteration {count} complete.")
+    logger.info("🔄 Iteration %d complete.", count)
     
-    if count >= 10:
+    if RESEARCH_TOOLS <= state.get('tools_used', set()):
+        logger.info("---DECISION: BOTH SOURCES SEARCHED, PROCEEDING TO WRITER---")
+        return "writer"
+    elif count >= 10:
         # If we've hit the max, proceed to the writer
-        print("---DECISION: MAX ITERATIONS REACHED, PROCEEDING TO WRITER---")
+        logger.info("---DECISION: MAX ITERATIONS REACHED, PROCEEDING TO WRITER---")
         return "writer"
     else:
         # Otherwise, go back to the researcher for evaluation
-        print("---DECISION: RETURNING TO RESEARCHER FOR EVALUATION---")
+        logger.info("---DECISION: RETURNING TO RESEARCHER FOR EVALUATION---")
         return "researcher"
 
 
@@ -84,3 +92,11 @@ def create_workflow():
 
     # Compile the graph into a runnable application
     return workflow.compile()
+
+
+@lru_cache(maxsize=1)
+def get_app():
+    """
+    Returns the compiled workflow, building it only once per process.
+    """
+    return create_workflow()
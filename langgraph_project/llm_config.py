@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 
@@ -7,8 +8,14 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 load_dotenv()
 
 
-# Configure the LLM to use Gemini
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=os.getenv("GOOGLE_API_KEY"),
-)
+@lru_cache(maxsize=1)
+def get_llm():
+    """
+    Returns the shared Gemini client, creating it on first use so every node
+    reuses the same underlying connection.
+    """
+    return ChatGoogleGenerativeAI(
+        model="gemini-1.5-flash",
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+    )
+
@@ -1,13 +1,56 @@
+import asyncio
+import io
+import logging
 import os
-import pprint
 from dotenv import load_dotenv
-from .graph import create_workflow
+from langchain_core.messages import BaseMessage
+from .graph import get_app
 
 # Load environment variables from .env file at the very start
 load_dotenv()
 
+OUTPUT_BUFFER_SIZE = 1 << 20
+# State channels that only repeat information already logged from the messages
+DIGEST_KEYS = {"compact_context"}
+# Longest text shown per field when logging non-string state updates
+MAX_FIELD_CHARS = 500
 
-def main():
+
+def _clip(value) -> str:
+    text = value if isinstance(value, str) else str(value)
+    return text if len(text) <= MAX_FIELD_CHARS else text[:MAX_FIELD_CHARS] + "..."
+
+
+def _format_item(item) -> str:
+    """Renders one message or result as a single bullet line."""
+    if isinstance(item, BaseMessage):
+        label = getattr(item, 'name', None) or type(item).__name__
+        tool_calls = getattr(item, 'tool_calls', None)
+        if tool_calls:
+            calls = ", ".join(f"{call['name']}({_clip(call['args'])})" for call in tool_calls)
+            return f"- {label}: tool calls {calls}"
+        return f"- {label}: {_clip(item.content)}"
+    if isinstance(item, dict):
+        title = item.get('title') or item.get('url')
+        if title and 'content' in item:
+            return f"- {title}: {_clip(item['content'])}"
+        return "- " + "; ".join(f"{key}: {_clip(value)}" for key, value in item.items())
+    return f"- {_clip(item)}"
+
+
+def format_update(content) -> str:
+    """
+    Flattens a non-string state value (messages, search results, counters) into
+    short markdown lines without recursively pretty-printing the whole object.
+    """
+    if isinstance(content, (list, tuple, set)):
+        return "\n".join(_format_item(item) for item in content)
+    if isinstance(content, (dict, BaseMessage)):
+        return _format_item(content)
+    return _clip(content)
+
+
+async def main():
     """
     Main function to run the LangGraph workflow.
     The output of the execution will be saved to a Markdown file in the 'output' directory,
@@ -23,7 +66,7 @@ def main():
     output_filename = os.path.join(output_dir, f"sample{i}.md")
 
     # --- 2. Create workflow and graph diagram ---
-    app = create_workflow()
+    app = get_app()
     try:
         # Generate a Mermaid diagram of the graph
         mermaid_graph = app.get_graph().draw_mermaid()
@@ -34,7 +77,9 @@ def main():
     # --- 3. Execute Workflow and Save Output ---
     print(f"Running workflow... Output will be saved to {output_filename}")
     
-    with open(output_filename, 'w', encoding='utf-8') as f:
+    # Large write buffer; flushed explicitly at section boundaries rather than on every small write
+    with open(output_filename, 'wb', buffering=OUTPUT_BUFFER_SIZE) as raw, \
+            io.TextIOWrapper(raw, encoding='utf-8', write_through=False, line_buffering=False) as f:
         # Write the diagram to the markdown file
         f.write("# Agent Workflow Diagram\n\n")
         f.write("```mermaid\n")
@@ -48,24 +93,51 @@ def main():
     
         # Run the graph and stream the results into the markdown file
         f.write(f"# AI Agent Execution Log for Task: \"{inputs['task']}\"\n\n")
-        for event in app.stream(inputs, config=config):
+        # Nodes that stream their LLM output (planner, writer) have their section header and
+        # text written as tokens arrive; remember which field was streamed so it is not repeated.
+        streaming_node = None
+        streamed_field = None
+        async for mode, event in app.astream(inputs, config=config, stream_mode=["updates", "custom"]):
+            if mode == "custom":
+                if event["node"] != streaming_node:
+                    streaming_node = event["node"]
+                    streamed_field = event["field"]
+                    f.write(f"## ➡️ Executing Node: `{streaming_node}`\n\n")
+                chunk = event["chunk"]
+                f.write(chunk)
+                if "\n" in chunk:
+                    # Keep streamed text visible on disk line by line without flushing every token
+                    f.flush()
+                continue
+
             for node_name, state_update in event.items():
-                f.write(f"## ➡️ Executing Node: `{node_name}`\n\n")
+                skip_field = None
+                if node_name == streaming_node:
+                    # Header and streamed text are already written; only the other fields remain
+                    skip_field = streamed_field
+                    streaming_node = None
+                else:
+                    f.write(f"## ➡️ Executing Node: `{node_name}`\n\n")
                 # The state_update is a dictionary, e.g., {'plan': '...'}
                 # We just want the text content from it.
-                for content in state_update.values():
+                for key, content in state_update.items():
+                    if key in DIGEST_KEYS or key == skip_field:
+                        continue
                     if isinstance(content, str):
                         # The content from the LLM is already in markdown format.
                         f.write(content)
                     else:
                         # Fallback for non-string content
-                        f.write("```json\n")
-                        f.write(pprint.pformat(content))
+                        f.write("```\n")
+                        f.write(format_update(content))
                         f.write("\n```")
                 f.write("\n\n---\n\n")
+                f.flush()
 
     print(f"Successfully saved output to {output_filename}")
 
 
 if __name__ == "__main__":
-    main()
+    # LOG_LEVEL=DEBUG turns on the detailed prompt/response dumps in the nodes
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+    asyncio.run(main())
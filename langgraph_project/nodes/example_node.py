@@ -1,51 +1,185 @@
-from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage
-from ..llm_config import llm
+from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage, AIMessage
+from collections import OrderedDict
+from functools import lru_cache
+from langgraph.config import get_stream_writer
+from ..llm_config import get_llm
 from ..state import AgentState
-from ..tools import search_tool, rag_tool
+from ..tools import rag_tool, ALL_TOOLS
+import asyncio
+import hashlib
+import io
 import json
-import pprint
+import logging
 
+logger = logging.getLogger(__name__)
 
-def planner_node(state: AgentState):
+# Most entries kept in each response cache; the least recently used is dropped first
+RESPONSE_CACHE_SIZE = 128
+
+
+class _LRUCache(OrderedDict):
+    """Dict holding at most RESPONSE_CACHE_SIZE entries, evicting the least recently used."""
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > RESPONSE_CACHE_SIZE:
+            self.popitem(last=False)
+
+
+# Researcher responses keyed by a hash of the exact prompt, so replayed histories skip the LLM
+_response_cache: _LRUCache = _LRUCache()
+
+
+def _messages_key(messages) -> str:
+    """Hashes the role, content and tool calls of every message in the prompt."""
+    payload = json.dumps(
+        [(type(m).__name__, m.content, getattr(m, 'tool_calls', None)) for m in messages],
+        default=str
+    )
+    return hashlib.blake2b(payload.encode()).hexdigest()
+
+
+# Older tool outputs are cut down to this many characters before re-prompting the researcher
+TOOL_MESSAGE_PREVIEW_CHARS = 500
+RECENT_TOOL_MESSAGES = 2
+
+
+def _truncate_old_tool_messages(messages):
+    """
+    Returns the history with every ToolMessage except the most recent ones truncated,
+    so the researcher prompt does not grow with each full tool output.
+    """
+    tool_positions = [i for i, m in enumerate(messages) if isinstance(m, ToolMessage)]
+    old_positions = set(tool_positions[:-RECENT_TOOL_MESSAGES])
+    trimmed = []
+    for i, msg in enumerate(messages):
+        if i in old_positions and len(msg.content) > TOOL_MESSAGE_PREVIEW_CHARS:
+            msg = msg.model_copy(update={"content": msg.content[:TOOL_MESSAGE_PREVIEW_CHARS] + "...[truncated]"})
+        trimmed.append(msg)
+    return trimmed
+
+
+# Each tool result is capped at this many characters in the writer's context
+CONTEXT_ENTRY_CHARS = 4096
+
+
+def _context_entry(tool_name: str, content: str) -> str:
+    """Formats one tool result for the writer's running context."""
+    if len(content) > CONTEXT_ENTRY_CHARS:
+        content = content[:CONTEXT_ENTRY_CHARS] + "...[truncated]"
+    return f"Search Results ({tool_name}): {content}\n\n"
+
+
+# The research loop is complete once every one of these has been used
+RESEARCH_TOOLS = frozenset(ALL_TOOLS)
+
+
+async def _stream_llm(messages, node: str, field: str) -> str:
+    """
+    Streams an LLM response through the graph's custom stream as it is generated
+    and returns the full text once complete.
+    """
+    stream_writer = get_stream_writer()
+    chunks = []
+    async for chunk in get_llm().astream(messages):
+        chunks.append(chunk.content)
+        stream_writer({"node": node, "field": field, "chunk": chunk.content})
+    return "".join(chunks)
+
+
+PLANNER_PROMPT = "You are an expert project planner. Create a simple, step-by-step plan to accomplish the user's task. Your plan should be clear and concise."
+
+# Plans keyed by a hash of the planner prompt and task, so replayed tasks skip the LLM
+_plan_cache: _LRUCache = _LRUCache()
+
+
+def _plan_key(task: str) -> str:
+    """Hashes the task together with the planner prompt, so editing the prompt invalidates old plans."""
+    return hashlib.blake2b(f"{PLANNER_PROMPT}\0{task}".encode()).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def get_llm_with_tools():
+    """Binds the research tools to the shared LLM once and reuses the result."""
+    return get_llm().bind_tools(list(ALL_TOOLS.values()))
+
+
+async def planner_node(state: AgentState):
     """
     This node acts as the "Manager". It takes the initial user task
-    and creates a plan for the other agents to follow.
+    and creates a plan for the other agents to follow, streaming it as it is written.
+    While the plan is being written, the knowledge base is searched with the raw
+    task so the researcher can start from those results.
     """
-    print("---PLANNING---")
-    messages = [
-        SystemMessage(content="You are an expert project planner. Create a simple, step-by-step plan to accomplish the user's task. Your plan should be clear and concise."),
-        HumanMessage(content=state['task'])
-    ]
-    response = llm.invoke(messages)
-    
+    logger.info("---PLANNING---")
+    prefetch = asyncio.create_task(rag_tool.ainvoke({"query": state['task']}))
+
+    try:
+        cache_key = _plan_key(state['task'])
+        plan = _plan_cache.get(cache_key)
+        if plan is not None:
+            logger.info("♻️ Reusing cached plan for this task")
+            get_stream_writer()({"node": "planner", "field": "plan", "chunk": plan})
+        else:
+            messages = [SystemMessage(content=PLANNER_PROMPT), HumanMessage(content=state['task'])]
+            plan = await _stream_llm(messages, node="planner", field="plan")
+            _plan_cache[cache_key] = plan
+    except BaseException:
+        # Planning failed or was cancelled: nobody will await the search any more
+        prefetch.cancel()
+        raise
+
+    try:
+        kb_prefetch = str(await prefetch)
+    except Exception as e:
+        logger.warning("⚠️ Speculative knowledge base search failed: %s", e)
+        kb_prefetch = ""
+
     # Initialize the iteration counter
-    return {"plan": response.content, "iteration_count": 0}
+    update = {"plan": plan, "iteration_count": 0}
+    if kb_prefetch:
+        # The search counts as done, so the researcher only has the web left to search
+        update["kb_prefetch"] = kb_prefetch
+        update["tools_used"] = {rag_tool.name}
+    return update
 
 
-def researcher_node(state: AgentState):
+async def researcher_node(state: AgentState):
     """
     The "brain" of the research process. This node evaluates the current state
     and decides the next best action. It can choose to:
     - Call a tool (for the first time or to refine results).
     - Conclude the research process if enough information has been gathered.
     """
-    print("---ROUTING: DECIDING NEXT STEP---")
+    logger.info("---ROUTING: DECIDING NEXT STEP---")
+
+    kb_prefetch = state.get('kb_prefetch')
+    if kb_prefetch:
+        first_turn = f"In your first turn, call `tavily_search`. `{rag_tool.name}` was already run for the task and its results are given below; only call it again to refine them."
+    else:
+        first_turn = f"In your first turn, call **both** `{rag_tool.name}` and `tavily_search` together in a single response. The two searches are independent and run in parallel."
 
     # Construct the prompt for the researcher LLM
-    system_prompt = """You are a master researcher. Your goal is to gather comprehensive information to fulfill the user's plan.
+    system_prompt = f"""You are a master researcher. Your goal is to gather comprehensive information to fulfill the user's plan.
 
 You have two tools available:
 1. `knowledge_base_search`: For internal documentation and established knowledge.
 2. `tavily_search`: For real-time web searches and current events.
 
 Your research strategy is as follows:
-1. Start with `knowledge_base_search` to see what internal information exists.
-2. Then, use `tavily_search` to get up-to-date information from the web.
-3. **Crucially, you must evaluate the results of each tool call.** If the results are not satisfactory (e.g., not relevant, not enough detail), you can call the **same tool again** with a refined query to get better results.
-4. After you are satisfied with the results from both tools, you can conclude the research.
+1. {first_turn}
+2. **Crucially, you must evaluate the results of each tool call.** If the results are not satisfactory (e.g., not relevant, not enough detail), you can call the **same tool again** with a refined query to get better results. Refined calls to both tools can again be made in the same response.
+3. After you are satisfied with the results from both tools, you can conclude the research.
 
 Based on the conversation history and the original plan, decide on the next best action. This could be:
-- Calling a tool (either for the first time or again).
+- Calling one or both tools (either for the first time or again).
 - Responding with a final summary if you have sufficient information. This will pass the result to the writer.
 """
 
@@ -54,115 +188,142 @@ Based on the conversation history and the original plan, decide on the next best
     plan_message = HumanMessage(content=f"Here is the research plan I need you to execute:\n\n{plan}")
     
     messages = [SystemMessage(content=system_prompt), plan_message]
-    messages.extend(state.get('messages', []))
+    if kb_prefetch:
+        messages.append(HumanMessage(
+            content=f"`{rag_tool.name}` was already run for the task. Its results:\n\n{kb_prefetch}"
+        ))
+    messages.extend(_truncate_old_tool_messages(state.get('messages', [])))
 
-    # Debug: Print messages being sent to LLM
-    print("📤 SENDING TO LLM:")
-    for i, msg in enumerate(messages):
-        # Truncate content for cleaner logging
-        content_preview = msg.content.replace('\n', ' ').strip()
-        if len(content_preview) > 150:
-            content_preview = content_preview[:150] + "..."
-        print(f"  Message {i}: {type(msg).__name__} - {content_preview}")
+    # Debug: Log messages being sent to LLM (skipped entirely unless DEBUG is enabled)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("📤 SENDING TO LLM:")
+        for i, msg in enumerate(messages):
+            # Truncate content for cleaner logging
+            content_preview = msg.content.replace('\n', ' ').strip()
+            if len(content_preview) > 150:
+                content_preview = content_preview[:150] + "..."
+            logger.debug("  Message %d: %s - %s", i, type(msg).__name__, content_preview)
 
-    # Bind the tools to the LLM
-    llm_with_tools = llm.bind_tools([search_tool, rag_tool])
+    llm_with_tools = get_llm_with_tools()
 
     try:
-        response = llm_with_tools.invoke(messages)
+        cache_key = _messages_key(messages)
+        response = _response_cache.get(cache_key)
+        if response is None:
+            response = await llm_with_tools.ainvoke(messages)
+            _response_cache[cache_key] = response
+        else:
+            logger.info("♻️ Reusing cached researcher response")
         
-        # Debug: Print the full response to see what's happening
-        print(f"🔍 FULL RESPONSE: {response}")
-        print(f"🔍 RESPONSE TYPE: {type(response)}")
-        print(f"🔍 HAS TOOL_CALLS: {hasattr(response, 'tool_calls')}")
-        if hasattr(response, 'tool_calls'):
-            print(f"🔍 TOOL_CALLS: {response.tool_calls}")
+        # Debug: Log the full response to see what's happening
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 RESPONSE CONTENT: %.500s", response.content)
+            logger.debug("🔍 RESPONSE TYPE: %s", type(response))
+            logger.debug("🔍 TOOL_CALLS: %s", response.tool_calls)
         
-        # Print which tool was selected
-        if hasattr(response, 'tool_calls') and response.tool_calls:
-            tool_name = response.tool_calls[0]['name']
-            tool_args = response.tool_calls[0]['args']
-            print(f"🔧 TOOL SELECTED: {tool_name}")
-            print(f"📝 QUERY: {tool_args}")
+        # Log which tools were selected
+        if response.tool_calls:
+            for call in response.tool_calls:
+                logger.info("🔧 TOOL SELECTED: %s", call['name'])
+                logger.info("📝 QUERY: %s", call['args'])
         else:
-            print("⚠️ NO TOOL SELECTED - Agent provided direct response")
+            logger.info("⚠️ NO TOOL SELECTED - Agent provided direct response")
         
         return {"messages": [response]}
     except Exception as e:
-        print(f"❌ ERROR IN LLM INVOCATION: {e}")
+        logger.error("❌ ERROR IN LLM INVOCATION: %s", e)
         # Return a simple response without tool calls to prevent crashes
-        from langchain_core.messages import AIMessage
         simple_response = AIMessage(content="Error occurred during tool selection")
         return {"messages": [simple_response]}
 
 
-def tool_node(state: AgentState):
+async def _run_tool(call):
+    """Runs a single tool call and wraps its output in a ToolMessage."""
+    tool_name = call['name']
+    tool_args = call['args']
+    logger.info("🚀 EXECUTING: %s", tool_name)
+    logger.debug("📋 WITH ARGS: %s", tool_args)
+    
+    selected_tool = ALL_TOOLS.get(tool_name)
+    if selected_tool is not None:
+        response = await selected_tool.ainvoke(tool_args)
+    else:
+        logger.error("❌ ERROR: Unknown tool %s", tool_name)
+        response = f"Error: Unknown tool {tool_name}"
+    
+    # Both tools already return strings; only convert anything else once
+    response_str = response if isinstance(response, str) else str(response)
+    logger.info("✅ TOOL RESPONSE RECEIVED (length: %d characters)", len(response_str))
+    logger.debug("📄 FIRST 200 CHARS: %.200s...", response_str)
+    
+    # Wrap the response as a ToolMessage with the correct name
+    return ToolMessage(
+        content=response_str, 
+        tool_call_id=call['id'],
+        name=tool_name
+    )
+
+
+async def tool_node(state: AgentState):
     """
-    This node executes the tool called by the researcher and increments
-    the iteration counter.
+    This node executes the tools called by the researcher concurrently and
+    increments the iteration counter.
     """
-    print("---EXECUTING TOOL---")
+    logger.info("---EXECUTING TOOL---")
     tool_calls = state['messages'][-1].tool_calls
+    # gather keeps the results in the same order as the tool calls; a failing tool
+    # becomes an error message instead of cancelling the other calls
+    results = await asyncio.gather(*(_run_tool(call) for call in tool_calls), return_exceptions=True)
     tool_responses = []
-    for call in tool_calls:
-        tool_name = call['name']
-        tool_args = call['args']
-        print(f"🚀 EXECUTING: {tool_name}")
-        print(f"📋 WITH ARGS: {tool_args}")
-        
-        if tool_name == search_tool.name:
-            print("🌐 Using Tavily web search...")
-            response = search_tool.invoke(tool_args)
-        elif tool_name == rag_tool.name:
-            print("📚 Using local knowledge base search...")
-            response = rag_tool.invoke(tool_args)
-        else:
-            print(f"❌ ERROR: Unknown tool {tool_name}")
-            response = f"Error: Unknown tool {tool_name}"
-        
-        print(f"✅ TOOL RESPONSE RECEIVED (length: {len(str(response))} characters)")
-        print(f"📄 FIRST 200 CHARS: {str(response)[:200]}...")
-        
-        # Append the response as a ToolMessage with the correct name
-        tool_responses.append(ToolMessage(
-            content=str(response), 
-            tool_call_id=call['id'],
-            name=tool_name
-        ))
+    for call, result in zip(tool_calls, results):
+        if isinstance(result, Exception):
+            logger.error("❌ ERROR: Tool %s failed: %s", call['name'], result)
+            result = ToolMessage(
+                content=f"Error: {call['name']} failed: {result}",
+                tool_call_id=call['id'],
+                name=call['name']
+            )
+        tool_responses.append(result)
     
     # Increment the iteration counter
     new_count = state.get('iteration_count', 0) + 1
     
-    # Return the responses and the updated count
-    return {"messages": tool_responses, "iteration_count": new_count}
+    # Return only what changed: the new responses, their digest for the writer,
+    # the count, and any source used for the first time
+    update = {
+        "messages": tool_responses,
+        "compact_context": "".join(_context_entry(m.name, m.content) for m in tool_responses),
+        "iteration_count": new_count,
+    }
+    new_tools = {call['name'] for call in tool_calls} - state.get('tools_used', set())
+    if new_tools:
+        update["tools_used"] = new_tools
+    return update
 
 
-def writer_node(state: AgentState):
+async def writer_node(state: AgentState):
     """
     This node takes the full conversation history and generates the final report.
+    The report is streamed out as it is generated through the graph's custom stream.
     """
-    print("---WRITING FINAL REPORT---")
+    logger.info("---WRITING FINAL REPORT---")
     
-    # Extract text content from the conversation history
-    context_parts = []
+    # Build the writer context from the task, plan and the accumulated search results
+    buf = io.StringIO()
     
     # Add the original task and plan
     if 'task' in state:
-        context_parts.append(f"Task: {state['task']}")
+        buf.write(f"Task: {state['task']}\n\n")
     if 'plan' in state:
-        context_parts.append(f"Plan: {state['plan']}")
+        buf.write(f"Plan: {state['plan']}\n\n")
     
-    # Extract content from messages (tool responses)
-    for message in state['messages']:
-        if hasattr(message, 'content') and message.content:
-            # For tool messages, the content is the search results
-            if message.__class__.__name__ == 'ToolMessage':
-                context_parts.append(f"Search Results: {message.content}")
-            elif message.__class__.__name__ == 'HumanMessage':
-                context_parts.append(f"User Input: {message.content}")
+    # The tool results were already digested as they arrived, so no message scan is needed
+    if state.get('kb_prefetch'):
+        buf.write(_context_entry(rag_tool.name, state['kb_prefetch']))
+    buf.write(state.get('compact_context', ''))
     
     # Combine all context
-    full_context = "\n\n".join(context_parts)
+    full_context = buf.getvalue().rstrip("\n")
     
     # Create the writer messages with proper text content
     system_prompt = "You are an expert technical writer. Based on the provided context, write a comprehensive and polished final report. Synthesize all the information provided."
@@ -172,5 +333,5 @@ def writer_node(state: AgentState):
         HumanMessage(content=full_context)
     ]
     
-    response = llm.invoke(writer_messages)
-    return {"review": response.content}
+    review = await _stream_llm(writer_messages, node="writer", field="review")
+    return {"review": review}
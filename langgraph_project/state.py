@@ -1,4 +1,5 @@
-from typing import TypedDict, Annotated, List
+import operator
+from typing import TypedDict, Annotated
 from langchain_core.messages import AnyMessage
 from langgraph.graph.message import add_messages
 
@@ -12,9 +13,14 @@ class AgentState(TypedDict):
     plan: str
     draft: str
     review: str
-    search_results: List[str]  # Add a list to store search results
+    # Knowledge base results fetched speculatively for the raw task while planning
+    kb_prefetch: str
+    # Append-only digest of tool results for the writer; each node adds only its new part
+    compact_context: Annotated[str, operator.add]
     # A counter for the research loop
     iteration_count: int
+    # Names of the tools executed so far; the reducer unions each node's new names in
+    tools_used: Annotated[set[str], operator.or_]
     # `messages` is a special field that will contain the conversation history.
     # `add_messages` is a helper function that appends messages to this list.
     messages: Annotated[list[AnyMessage], add_messages]
@@ -1,67 +1,194 @@
+import asyncio
+import hashlib
+import logging
 import os
-from tavily import TavilyClient
-from langchain_core.tools import Tool, tool
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+import threading
+import weakref
+from functools import lru_cache
+import diskcache
+from langchain_core.tools import StructuredTool, Tool, tool
 from pydantic import BaseModel, Field
 
+logger = logging.getLogger(__name__)
+
 # --- Configuration ---
 VECTORSTORE_DIR = "vectorstore"
-EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+RAG_CACHE_SIZE = 512
+RAG_TOP_K = 4
+RAG_FETCH_K = 20
+TAVILY_CACHE_DIR = ".tavily_cache"
+TAVILY_CACHE_TTL = 3600
+TAVILY_SEARCH_DEPTH = "advanced"
+TAVILY_MAX_RESULTS = 5
+TAVILY_SNIPPET_CHARS = 600
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+TAVILY_TIMEOUT = 30
 
 # --- Tavily Web Search Tool ---
-# Initialize the Tavily client directly
-tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+# Heavy clients (Tavily, Chroma, the embedding model) are imported and created on first use,
+# so importing this module stays cheap when a tool is never called.
+@lru_cache(maxsize=1)
+def get_tavily_client():
+    """Creates the Tavily client on the first web search."""
+    from tavily import TavilyClient
+    return TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+
+@lru_cache(maxsize=1)
+def get_tavily_cache():
+    """Disk cache for search results, kept for an hour so repeated queries skip the network."""
+    return diskcache.Cache(TAVILY_CACHE_DIR)
 
 class TavilySearchInput(BaseModel):
     query: str = Field(description="The search query to find information on the web")
 
-@tool("tavily_search", args_schema=TavilySearchInput)
+def _compact_results(results) -> str:
+    """
+    Renders Tavily results as one "title (url): snippet" line each instead of the raw
+    list-of-dicts repr, so far fewer tokens are re-sent to the LLM on later turns.
+    """
+    lines = []
+    for result in results:
+        content = result.get('content') or ''
+        if len(content) > TAVILY_SNIPPET_CHARS:
+            content = content[:TAVILY_SNIPPET_CHARS] + "..."
+        lines.append(f"{result.get('title', '')} ({result.get('url', '')}): {content}")
+    return "\n".join(lines) if lines else "No web results found."
+
+def _tavily_cache_key(query: str) -> str:
+    return hashlib.sha1(f"{query}|{TAVILY_SEARCH_DEPTH}|{TAVILY_MAX_RESULTS}".encode("utf-8")).hexdigest()
+
 def tavily_search_func(query: str) -> str:
     """Performs a search using Tavily web search for current information and latest developments."""
+    key = _tavily_cache_key(query)
+    tavily_cache = get_tavily_cache()
+    results = tavily_cache.get(key)
+    if results is not None:
+        return _compact_results(results)
     try:
         # The .search method returns a dictionary; we're interested in the 'results' key.
-        response = tavily_client.search(query=query, search_depth="advanced", max_results=5)
-        return str(response['results'])
+        response = get_tavily_client().search(query=query, search_depth=TAVILY_SEARCH_DEPTH, max_results=TAVILY_MAX_RESULTS)
+        # Only successful responses are cached, so errors are retried next time
+        tavily_cache.set(key, response['results'], expire=TAVILY_CACHE_TTL)
+        return _compact_results(response['results'])
+    except Exception as e:
+        return f"An error occurred during search: {e}"
+
+# One pooled HTTP/2 client per event loop, so connections and TLS sessions are reused across searches.
+# Each entry also holds the async generator that closes the client when the loop shuts down.
+_http_clients = weakref.WeakKeyDictionary()
+
+async def _close_on_loop_shutdown(loop, client):
+    """Parks at its yield; the loop finalizes open async generators on shutdown, running the close."""
+    try:
+        yield
+    finally:
+        # The generator refers back to its loop, so the entry would otherwise keep the loop alive
+        _http_clients.pop(loop, None)
+        await client.aclose()
+
+def get_http_client():
+    """Returns the async HTTP client for the running event loop, creating it on first use."""
+    import httpx
+    loop = asyncio.get_running_loop()
+    entry = _http_clients.get(loop)
+    if entry is None:
+        client = httpx.AsyncClient(
+            http2=True,
+            timeout=TAVILY_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=10),
+        )
+        closer = _close_on_loop_shutdown(loop, client)
+        # Advancing the generator registers it with the loop, which closes it in shutdown_asyncgens()
+        loop.create_task(anext(closer))
+        entry = _http_clients[loop] = (client, closer)
+    return entry[0]
+
+async def tavily_search_async(query: str) -> str:
+    """Async version of tavily_search_func that calls the Tavily REST API over the pooled client."""
+    key = _tavily_cache_key(query)
+    tavily_cache = get_tavily_cache()
+    results = tavily_cache.get(key)
+    if results is not None:
+        return _compact_results(results)
+    try:
+        response = await get_http_client().post(
+            TAVILY_SEARCH_URL,
+            json={"query": query, "search_depth": TAVILY_SEARCH_DEPTH, "max_results": TAVILY_MAX_RESULTS},
+            headers={"Authorization": f"Bearer {os.getenv('TAVILY_API_KEY')}"},
+        )
+        response.raise_for_status()
+        results = response.json()['results']
+        # Only successful responses are cached, so errors are retried next time
+        tavily_cache.set(key, results, expire=TAVILY_CACHE_TTL)
+        return _compact_results(results)
     except Exception as e:
         return f"An error occurred during search: {e}"
 
-# The tool is now the decorated function itself
-search_tool = tavily_search_func
+# The sync function stays available for .invoke(); ainvoke() (used by tool_node) goes through the async client
+search_tool = StructuredTool.from_function(
+    func=tavily_search_func,
+    coroutine=tavily_search_async,
+    name="tavily_search",
+    description=tavily_search_func.__doc__,
+    args_schema=TavilySearchInput,
+)
 
 # --- RAG Knowledge Base Tool ---
 class KnowledgeBaseSearchInput(BaseModel):
     query: str = Field(description="The search query to find information in the local knowledge base")
 
+_vectorstore = None
+_vectorstore_lock = threading.Lock()
+
+
+def get_vectorstore():
+    """Opens the persisted knowledge base once and shares it across the process."""
+    global _vectorstore
+    if _vectorstore is None:
+        with _vectorstore_lock:
+            if _vectorstore is None:
+                from langchain_chroma import Chroma
+                from .embeddings import get_embeddings
+                _vectorstore = Chroma(persist_directory=VECTORSTORE_DIR, embedding_function=get_embeddings())
+    return _vectorstore
+
+
+@lru_cache(maxsize=RAG_CACHE_SIZE)
+def _cached_rag_search(normalized_query: str) -> str:
+    vectorstore = get_vectorstore()
+    # Embed the query once and run MMR directly on the vector for more diverse chunks
+    query_embedding = vectorstore.embeddings.embed_query(normalized_query)
+    docs = vectorstore.max_marginal_relevance_search_by_vector(
+        query_embedding, k=RAG_TOP_K, fetch_k=RAG_FETCH_K
+    )
+    if docs:
+        # Combine the content of all retrieved documents
+        combined_content = "\n\n".join([doc.page_content for doc in docs])
+        return combined_content
+    else:
+        return "No relevant information found in the knowledge base."
+
+
 def create_rag_tool():
-    """Creates a RAG tool for searching the local knowledge base."""
-    try:
-        # Load the vector store and create a retriever
-        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
-        vectorstore = Chroma(persist_directory=VECTORSTORE_DIR, embedding_function=embeddings)
-        retriever = vectorstore.as_retriever()
-
-        @tool("knowledge_base_search", args_schema=KnowledgeBaseSearchInput)
-        def rag_search_func(query: str) -> str:
-            """Searches the local knowledge base for specific information about AI advancements, ethics, and internal documents."""
-            docs = retriever.invoke(query)
-            if docs:
-                # Combine the content of all retrieved documents
-                combined_content = "\n\n".join([doc.page_content for doc in docs])
-                return combined_content
-            else:
-                return "No relevant information found in the knowledge base."
-
-        return rag_search_func
-    except Exception as e:
-        print(f"Failed to create RAG tool: {e}")
-        
-        @tool("knowledge_base_search", args_schema=KnowledgeBaseSearchInput)
-        def error_rag_search(query: str) -> str:
-            """Knowledge base is currently unavailable."""
+    """
+    Creates a RAG tool for searching the local knowledge base.
+    The vector store is only loaded when the tool is first used.
+    """
+    @tool("knowledge_base_search", args_schema=KnowledgeBaseSearchInput)
+    def rag_search_func(query: str) -> str:
+        """Searches the local knowledge base for specific information about AI advancements, ethics, and internal documents."""
+        try:
+            # Repeated queries (ignoring case and surrounding whitespace) are answered from memory
+            return _cached_rag_search(query.strip().lower())
+        except Exception as e:
+            # Failures are not cached, so the next call retries loading the vector store
+            logger.warning("Failed to search the knowledge base: %s", e)
             return f"Error: RAG tool not available. Could not load vector store. Details: {e}"
-        
-        return error_rag_search
+
+    return rag_search_func
 
 # --- Initialize Tools ---
 rag_tool = create_rag_tool()
+
+# Name -> tool lookup for dispatching the LLM's tool calls
+ALL_TOOLS = {t.name: t for t in (search_tool, rag_tool)}
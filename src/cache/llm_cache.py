@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Callable, List, Optional
+
+import diskcache
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cached responses expire after this many seconds
+DEFAULT_TTL = 3600
+# Cosine similarity above which a different prompt is treated as the same question
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+
+
+class _CallAbandoned(Exception):
+    """Given to callers sharing an in-flight LLM call when the caller making it stops first"""
+
+
+def _default_embedder():
+    """Chroma's bundled MiniLM ONNX model, the same one the vector store embeds with"""
+    from chromadb.utils import embedding_functions
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+class CachingLLMClient:
+    """
+    Wraps a chat model's ainvoke with an in-memory response cache.
+
+    Prompts are looked up by an exact hash of (model, temperature, prompt) first, then
+    by embedding similarity of their varying part against the entries already cached,
+    so a request that is only worded differently reuses the earlier answer. With a
+    cache_dir, entries are also written to disk and reloaded by later processes. With
+    cacheable, only responses it accepts are stored; the others are returned uncached.
+    """
+
+    def __init__(self, llm, embedder: Optional[Callable[[List[str]], Any]] = None,
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD, ttl: float = DEFAULT_TTL,
+                 cache_dir: Optional[str] = None,
+                 cacheable: Optional[Callable[[Any], bool]] = None):
+        self.llm = llm
+        self.cacheable = cacheable
+        self._embedder = embedder
+        self._semantic_enabled = True
+        self.threshold = threshold
+        self.ttl = ttl
+        # key -> (expires_at, response)
+        self._exact = {}
+        # Parallel lists for the semantic lookup; rows of _vectors are unit-normalized
+        self._semantic_keys: List[str] = []
+        self._vectors = None
+        # key -> future of the LLM call currently running for that prompt
+        self._inflight = {}
+        self._disk = diskcache.Cache(cache_dir) if cache_dir else None
+        if self._disk is not None:
+            self._load_disk()
+
+    def _load_disk(self) -> None:
+        """Fills the in-memory lookups with the unexpired entries stored by earlier runs"""
+        vectors = []
+        for key in self._disk.iterkeys():
+            entry, expires_at = self._disk.get(key, expire_time=True)
+            if entry is None:
+                continue
+            vector, response = entry
+            self._exact[key] = (expires_at, response)
+            if vector is not None:
+                self._semantic_keys.append(key)
+                vectors.append(vector)
+        if vectors:
+            self._vectors = np.vstack(vectors)
+
+    def _key(self, prompt: str) -> str:
+        payload = json.dumps([
+            getattr(self.llm, 'model_name', None) or getattr(self.llm, 'model', None),
+            getattr(self.llm, 'temperature', None),
+            prompt,
+        ], default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Unit vector for the text, or None when no embedding model is available"""
+        if not self._semantic_enabled:
+            return None
+        try:
+            if self._embedder is None:
+                self._embedder = _default_embedder()
+            vector = np.asarray(self._embedder([text])[0], dtype=np.float32)
+        except Exception as e:
+            logger.warning("⚠️ Semantic cache disabled, embedding failed: %s", e)
+            self._semantic_enabled = False
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _get(self, key: str):
+        entry = self._exact.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.time():
+            del self._exact[key]
+            return None
+        return response
+
+    def _semantic_lookup(self, vector: np.ndarray):
+        if self._vectors is None:
+            return None
+        scores = self._vectors @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return self._get(self._semantic_keys[best])
+
+    def _store(self, key: str, vector: Optional[np.ndarray], response) -> None:
+        self._exact[key] = (time.time() + self.ttl, response)
+        if self._disk is not None:
+            self._disk.set(key, (vector, response), expire=self.ttl)
+        if vector is None:
+            return
+        # Drop rows whose entries have expired before adding the new one
+        live = [i for i, k in enumerate(self._semantic_keys) if self._get(k) is not None]
+        self._semantic_keys = [self._semantic_keys[i] for i in live] + [key]
+        rows = [self._vectors[live]] if live else []
+        self._vectors = np.vstack(rows + [vector[None, :]])
+
+    async def ainvoke(self, prompt: str, semantic_text: Optional[str] = None):
+        """
+        Returns the cached response for this prompt, else calls the LLM. When semantic_text
+        is given (the part of the prompt that varies, e.g. the user's request), it is
+        embedded and a cached prompt with a near-identical semantic_text also counts as a hit;
+        embedding the whole prompt would let the shared template dominate the similarity.
+        """
+        key = self._key(prompt)
+        response = self._get(key)
+        if response is not None:
+            logger.info("♻️ LLM cache hit (exact)")
+            return response
+
+        # Concurrent callers with the same prompt wait for the first one's call
+        pending = self._inflight.get(key)
+        if pending is not None:
+            logger.info("♻️ LLM call shared with an identical prompt in flight")
+            try:
+                return await asyncio.shield(pending)
+            except _CallAbandoned:
+                # The caller making the call was cancelled, not this one: make it again
+                return await self.ainvoke(prompt, semantic_text)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = None
+            vector = self._embed(semantic_text) if semantic_text else None
+            if vector is not None:
+                response = self._semantic_lookup(vector)
+                if response is not None:
+                    logger.info("♻️ LLM cache hit (semantic)")
+            if response is None:
+                response = await self.llm.ainvoke(prompt)
+                if self.cacheable is None or self.cacheable(response):
+                    self._store(key, vector, response)
+                else:
+                    logger.warning("⚠️ LLM response not cached, it was rejected as incomplete")
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve it here so a failure nobody else waited on is not reported as unhandled
+            future.exception()
+            raise
+        finally:
+            # Cancelled (or interrupted) before finishing: release the waiters to retry
+            if not future.done():
+                future.set_exception(_CallAbandoned())
+                future.exception()
+            del self._inflight[key]
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+# Whole-run results, keyed by request and code version, live here for RUN_CACHE_TTL seconds
+RUN_CACHE_PATH = os.getenv("RUN_CACHE_PATH", ".run_cache.sqlite")
+RUN_CACHE_TTL = int(os.getenv("RUN_CACHE_TTL", "86400"))
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+
+@lru_cache(maxsize=1)
+def graph_version() -> str:
+    """
+    Hash of every source file under src/, so any change to a node, edge or prompt
+    invalidates results cached by an older version of the graph.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(SRC_DIR.rglob("*.py")):
+        digest.update(str(path.relative_to(SRC_DIR)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def run_fingerprint(user_request: str) -> str:
+    payload = json.dumps({"user_request": user_request, "graph_version": graph_version()}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_finished_run(state: Any) -> bool:
+    """Whether a final state is worth replaying: the run passed testing and asked no questions"""
+    if state.get("is_clarification_needed"):
+        return False
+    return (state.get("validation_report") or {}).get("status") == "Passed"
+
+
+class RunCache:
+    """
+    SQLite-backed store of final graph states. A repeated request against unchanged
+    code returns the stored state instead of running the graph again. Runs that failed
+    or stopped for clarification are not stored, so they are retried.
+    Usable as a context manager that closes the connection on exit.
+    """
+
+    def __init__(self, path: str = RUN_CACHE_PATH, ttl: int = RUN_CACHE_TTL):
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs (fingerprint TEXT PRIMARY KEY, expires_at REAL, state BLOB)"
+        )
+
+    def __enter__(self) -> "RunCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get(self, fingerprint: str) -> Optional[Any]:
+        row = self.conn.execute(
+            "SELECT state FROM runs WHERE fingerprint = ? AND expires_at > ?", (fingerprint, time.time())
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, fingerprint: str, state: Any) -> None:
+        if not is_finished_run(state):
+            return
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?)",
+                (fingerprint, time.time() + self.ttl, pickle.dumps(dict(state)))
+            )
+            self.conn.execute("DELETE FROM runs WHERE expires_at <= ?", (time.time(),))
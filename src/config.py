@@ -1,23 +1,110 @@
+import asyncio
+import atexit
+import logging
 import os
+import queue
+import weakref
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
-from openai import OpenAI
+
 # Load .env file
 load_dotenv()
 
+# Set LLM_PROVIDER=gemini to call Google directly instead of going through OpenRouter
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openrouter")
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_MODEL = "google/gemini-pro-1.5"
+GEMINI_MODEL = "gemini-1.5-pro"
+# Only Anthropic models understand cache_control blocks marking a prompt prefix to cache
+PROMPT_CACHE_CONTROL = LLM_PROVIDER == "openrouter" and OPENROUTER_MODEL.startswith("anthropic/")
+# Most LLM requests in flight at once per event loop, to stay under the provider's rate limit
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "8"))
+# Connection pool of the HTTP/2 client used for OpenRouter calls
+LLM_HTTP_MAX_CONNECTIONS = 256
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = 64
+# LOG_LEVEL=WARNING hides the per-node and per-task progress lines
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+
+@lru_cache(maxsize=1)
+def get_llm():
+    """
+    Returns the process-wide chat model for the configured provider.
+    Built on first use so importing a node does not open any client.
+    """
+    if LLM_PROVIDER == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        return ChatGoogleGenerativeAI(
+            model=GEMINI_MODEL,
+            google_api_key=os.getenv("GOOGLE_API_KEY")
+        )
+
+    import httpx
+    import openai
+    from langchain_community.chat_models import ChatOpenAI
+
+    # Parallel workers multiplex their requests over a few HTTP/2 connections to
+    # OpenRouter instead of each waiting for an HTTP/1.1 one. Only the async SDK client
+    # gets this pool: the sync one rejects an httpx.AsyncClient, and nodes always await.
+    async_client = openai.AsyncOpenAI(
+        base_url=OPENROUTER_BASE_URL,
+        api_key=os.getenv("OPENROUTER_API_KEY"),
+        http_client=httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+    )
+    return ChatOpenAI(
+        model=OPENROUTER_MODEL,
+        openai_api_base=OPENROUTER_BASE_URL,
+        openai_api_key=os.getenv("OPENROUTER_API_KEY"),
+        async_client=async_client.chat.completions
+    )
+
+
+_llm_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """
+    Returns the semaphore bounding concurrent LLM calls on the running event loop.
+    Kept per loop because a semaphore cannot be shared between event loops.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _llm_semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+    return semaphore
 
-load_dotenv()
 
-# Create OpenAI client
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY")
-)
+async def ainvoke_llm(prompt, llm=None, **kwargs):
+    """
+    Awaits the shared chat model (or llm, e.g. a caching wrapper around it), waiting
+    for a free slot when too many calls are in flight. kwargs go to llm.ainvoke.
+    """
+    async with get_llm_semaphore():
+        return await (llm or get_llm()).ainvoke(prompt, **kwargs)
 
-# Use with LangChain
-from langchain_community.chat_models import ChatOpenAI
+@lru_cache(maxsize=1)
+def setup_logging() -> QueueListener:
+    """
+    Routes log records through a queue to a background thread that writes them,
+    so nodes and parallel workers only enqueue a record instead of blocking on stdout.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, handler)
 
-llm = ChatOpenAI(
-    model="google/gemini-pro-1.5",
-    openai_api_base="https://openrouter.ai/api/v1",
-    openai_api_key=os.getenv("OPENROUTER_API_KEY")
-)
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+    # Flush whatever is still queued before the interpreter exits
+    atexit.register(listener.stop)
+    return listener
@@ -3,12 +3,126 @@ import re
 import json 
 import hashlib 
 from pathlib import Path 
-from typing import List, Dict, Optional, Tuple 
-from dataclasses import dataclass, field, asdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice, repeat
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator
+from dataclasses import dataclass, field
+from functools import lru_cache
 import chromadb 
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
 
-@dataclass
+# orjson parses noticeably faster when it is installed; its decode error subclasses json's
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Documents are embedded up front in batches of this size before being written to Chroma
+EMBED_BATCH_SIZE = 64
+# Documents per collection.add() call; well under Chroma's max batch size
+INSERT_BATCH_SIZE = 512
+# HNSW index settings; only applied when a collection is created, so call
+# clear_collection() to rebuild an existing one with them
+COLLECTION_METADATA = {
+    "description": "Narbtech code chunks for RAG",
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+}
+
+# Non-relative module of every `import ... from 'module'` or bare `import 'module'` line,
+# matched in one pass over the whole file instead of line by line
+_IMPORT_LINE_RE = re.compile(
+    r"""^[^\S\n]*import[^\S\n](?:[^\n]*?[^\S\n]from[^\S\n]+|[^\S\n]*)["']([^"'\n]+)["']""",
+    re.MULTILINE
+)
+
+# Files and directories with one of these names are skipped; ignored directories are
+# not walked at all
+IGNORE_NAMES = frozenset({
+    'node_modules', '.next', '.expo', 'dist', 'build', '.git', '.env', '.DS_Store',
+    '__pycache__', '.pytest_cache', 'coverage', '.nyc_output'
+})
+
+# Updated patterns for modern JS/TS projects, checked in order; a file gets the first
+# category whose directory appears in its path and whose suffix or exact name matches.
+# (category, directory, suffixes, file names)
+FILE_CATEGORIES = (
+    ('components', 'components', ('.tsx', '.jsx'), ()),
+    ('pages', 'pages', ('.ts', '.js', '.tsx', '.jsx'), ()),
+    ('app_routes', 'app', (), ('page.tsx', 'layout.tsx', 'loading.tsx', 'error.tsx')),
+    ('app_components', 'app', ('.tsx', '.jsx'), ()),
+    ('api', 'api', ('.ts', '.js'), ()),
+    ('utils', 'utils', ('.ts', '.js'), ()),
+    ('lib', 'lib', ('.ts', '.js'), ()),
+    ('hooks', 'hooks', ('.ts', '.js'), ()),
+    ('schemas', 'schemas', ('.ts',), ()),
+    ('schemas', 'types', ('.ts',), ()),
+    ('styles', None, ('.css', '.scss'), ()),
+    ('config', None, ('.config.ts', '.config.js', '.config.json'), ()),
+    ('screens', 'screens', ('.tsx', '.ts'), ()),
+    ('navigation', 'navigation', ('.tsx', '.ts'), ()),
+)
+# Only picked up at the project root
+ROOT_CONFIG_FILES = frozenset({'package.json', 'tsconfig.json'})
+
+# Projects with fewer files than this are processed inline; below it, starting
+# worker processes costs more than the parsing they would take over
+PARALLEL_MIN_FILES = 200
+# Files handed to a worker per round trip
+PROCESS_CHUNKSIZE = 32
+# Larger files (bundles, generated code) are skipped rather than embedded whole
+MAX_FILE_BYTES = 1 << 20
+
+# Any of these in a .tsx/.jsx file marks it as a React component; one alternation
+# scans the content once instead of once per pattern
+REACT_PATTERNS = (
+    'export default function',
+    'export const',
+    'return (',
+    'React.',
+    'useState',
+    'useEffect',
+    '<div',
+    '<View',
+    'JSX.Element',
+    'FC<',
+    'FunctionComponent'
+)
+_REACT_DETECT_RE = re.compile('|'.join(map(re.escape, REACT_PATTERNS)))
+# Exported component declarations: `export default function Name(` or `export const Name =`
+_COMPONENT_NAME_RE = re.compile(
+    r'^\s*export (?:default function ([^(\n]*)|const ([^=\n]*))',
+    re.MULTILINE
+)
+# Larger files (minified bundles and the like) are never treated as components
+REACT_SCAN_MAX_CHARS = 500_000
+
+# Request keywords that route retrieval to the UI, backend and auth searches
+UI_TERMS = frozenset({'page', 'component', 'form', 'button', 'ui', 'interface', 'layout', 'design', 'dashboard', 'screen'})
+BACKEND_TERMS = frozenset({'api', 'database', 'function', 'store', 'save', 'fetch', 'query', 'mutation', 'convex'})
+AUTH_TERMS = frozenset({'auth', 'login', 'signin', 'signup', 'user', 'authentication', 'clerk'})
+# Words added to the request for the targeted search of each area it mentions
+AREA_QUERY_TERMS = {
+    'ui': "React component UI",
+    'backend': "function API",
+    'auth': "authentication login",
+}
+# One pass tags a request with every category whose term appears in it; the lookahead
+# matches at each position, so terms are found anywhere, as substrings
+_KEYWORD_RE = re.compile('(?=' + '|'.join(
+    f"(?P<{tag}>{'|'.join(map(re.escape, sorted(terms, key=len, reverse=True)))})"
+    for tag, terms in (('ui', UI_TERMS), ('backend', BACKEND_TERMS), ('auth', AUTH_TERMS))
+) + ')')
+
+def keyword_tags(request: str) -> set:
+    """Return which of 'ui', 'backend' and 'auth' the request mentions"""
+    return {match.lastgroup for match in _KEYWORD_RE.finditer(request.lower())}
+
+@dataclass(slots=True)
 class CodeVectorStore: 
     content: str 
     file_path: str
@@ -27,45 +141,69 @@ class ProjectProcessor:
         print("✅ ProjectProcessor initialized (Tree Sitter disabled)")
 
     def process_project(self, project_path: str, project_name: str) -> List[CodeVectorStore]: 
-        chunks = []
-        project_root = Path(project_path)
-        
-        # Updated patterns for modern JS/TS projects
-        file_patterns = {
-            'components': ['**/components/**/*.tsx', '**/components/**/*.jsx'],
-            'pages': ['**/pages/**/*.ts', '**/pages/**/*.js', '**/pages/**/*.tsx', '**/pages/**/*.jsx'],
-            'app_routes': ['**/app/**/page.tsx', '**/app/**/layout.tsx', '**/app/**/loading.tsx', '**/app/**/error.tsx'],
-            'app_components': ['**/app/**/*.tsx', '**/app/**/*.jsx'],
-            'api': ['**/api/**/*.ts', '**/api/**/*.js'],
-            'utils': ['**/utils/**/*.ts', '**/utils/**/*.js'],
-            'lib': ['**/lib/**/*.ts', '**/lib/**/*.js'],
-            'hooks': ['**/hooks/**/*.ts', '**/hooks/**/*.js'],
-            'schemas': ['**/schemas/**/*.ts', '**/types/**/*.ts'],
-            'styles': ['**/*.css', '**/*.scss', '**/*.module.css'],
-            'config': ['**/*.config.ts', '**/*.config.js', '**/*.config.json', 'package.json', 'tsconfig.json'],
-            'screens': ['**/screens/**/*.tsx', '**/screens/**/*.ts'],
-            'navigation': ['**/navigation/**/*.tsx', '**/navigation/**/*.ts'],
-        }
-    
-        for category, patterns in file_patterns.items(): 
-            for pattern in patterns: 
-                for file in project_root.glob(pattern): 
-                    if file.is_file() and not self._should_ignore_file(file):
-                        chunks.extend(self._process_file(file, category, project_name))
-        
+        chunks = list(self.iter_project(project_path, project_name))
         print(f"✅ Processed {len(chunks)} chunks from {project_name}")
         return chunks
+
+    def iter_project(self, project_path: str, project_name: str) -> Iterator[CodeVectorStore]:
+        """Yield the project's chunks file by file instead of building the whole list"""
+        project_root = Path(project_path)
+        files_to_process = []
+        categories = []
+        
+        # One walk over the tree; ignored directories are pruned instead of descended into
+        for root, dirs, files in os.walk(project_root):
+            dirs[:] = [d for d in dirs if d not in IGNORE_NAMES]
+            rel_dirs = set(Path(root).relative_to(project_root).parts)
+            for name in files:
+                # Ignored directories were pruned above, so only the file name itself is left to check
+                if name in IGNORE_NAMES:
+                    continue
+                category = self._categorize(rel_dirs, name)
+                if category is None:
+                    continue
+                file = Path(root, name)
+                if file.is_file():
+                    files_to_process.append(file)
+                    categories.append(category)
+        
+        # Reading and parsing files is independent per file, so large projects fan out to all cores
+        if len(files_to_process) >= PARALLEL_MIN_FILES:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                results = executor.map(
+                    _process_file_in_worker, files_to_process, categories, repeat(project_name),
+                    chunksize=PROCESS_CHUNKSIZE
+                )
+                for file_chunks in results:
+                    yield from file_chunks
+        else:
+            for file, category in zip(files_to_process, categories):
+                yield from self._process_file(file, category, project_name)
         
+    def _categorize(self, rel_dirs: set, name: str) -> Optional[str]:
+        """Return the first category in FILE_CATEGORIES that matches the file, if any"""
+        for category, directory, suffixes, names in FILE_CATEGORIES:
+            if directory is not None and directory not in rel_dirs:
+                continue
+            if name.endswith(suffixes) or name in names:
+                return category
+        if not rel_dirs and name in ROOT_CONFIG_FILES:
+            return 'config'
+        return None
+
     def _should_ignore_file(self, file: Path) -> bool: 
-        ignore_patterns = [ 
-            'node_modules', '.next', '.expo', 'dist', 'build', '.git', '.env', '.DS_Store',
-            '__pycache__', '.pytest_cache', 'coverage', '.nyc_output'
-        ] 
-        return any(pattern in str(file) for pattern in ignore_patterns)
+        return not IGNORE_NAMES.isdisjoint(file.parts)
 
     def _process_file(self, file: Path, category: str, project_name: str) -> List[CodeVectorStore]: 
         try: 
-            content = file.read_text(encoding='utf-8')
+            size = file.stat().st_size
+            if size > MAX_FILE_BYTES:
+                print(f"Skipping large file {file} ({size} bytes)")
+                return []
+            content = file.read_bytes().decode('utf-8', errors='replace')
+            if '\r' in content:
+                # Same newline handling read_text() applied
+                content = content.replace('\r\n', '\n').replace('\r', '\n')
             
             if file.suffix == '.json':
                 return self._process_json_file(file, project_name, content)
@@ -98,18 +236,17 @@ class ProjectProcessor:
         try:
             framework_type = self._determine_framework_type(file, content)
             dependencies = self._extract_dependencies(content)
+            # Split once; the name and description helpers all scan the same lines
+            lines = content.split('\n')
             
-            # Determine if this looks like a React component
-            is_component = self._detect_react_component(content, file.name)
+            # Determine if this looks like a React component, and its name if so
+            is_component, component_name = self._analyze_component(content, file.name)
             
-            # Extract component/function names
-            component_name = None
+            # Extract function names
             function_name = None
             
-            if is_component:
-                component_name = self._extract_component_name(content, file.name)
-            else:
-                function_name = self._extract_function_name(content)
+            if not is_component:
+                function_name = self._extract_function_name(lines)
             
             chunk = CodeVectorStore(
                 content=content,
@@ -120,7 +257,7 @@ class ProjectProcessor:
                 component_name=component_name,
                 function_name=function_name,
                 dependencies=dependencies,
-                description=self._generate_description(content, file.name, framework_type, is_component),
+                description=self._generate_description(lines, file.name, framework_type, is_component, component_name),
                 framework=framework_type
             )
             
@@ -160,56 +297,36 @@ class ProjectProcessor:
         
         return 'general'
 
-    def _detect_react_component(self, content: str, filename: str) -> bool:
-        """Simple detection for React components"""
-        if not filename.endswith(('.tsx', '.jsx')):
-            return False
-            
+    def _analyze_component(self, content: str, filename: str) -> Tuple[bool, Optional[str]]:
+        """Detect React components and extract the component name in the same step"""
+        if not filename.endswith(('.tsx', '.jsx')) or len(content) > REACT_SCAN_MAX_CHARS:
+            return False, None
+        
         # Check for React patterns in content
-        react_patterns = [
-            'export default function',
-            'export const',
-            'return (',
-            'React.',
-            'useState',
-            'useEffect',
-            '<div',
-            '<View',
-            'JSX.Element',
-            'FC<',
-            'FunctionComponent'
-        ]
-        return any(pattern in content for pattern in react_patterns)
-
-    def _extract_component_name(self, content: str, filename: str) -> Optional[str]:
-        """Extract component name from file"""
-        # Try to get from filename first
+        if _REACT_DETECT_RE.search(content) is None:
+            return False, None
+        
+        # Try to get the name from the filename first
         base_name = filename.split('.')[0]
         if base_name and base_name[0].isupper():
-            return base_name
-        
-        # Try to extract from export statements
-        lines = content.split('\n')
-        for line in lines:
-            line = line.strip()
-            if line.startswith('export default function '):
-                parts = line.split('export default function ')
-                if len(parts) > 1:
-                    name = parts[1].split('(')[0].strip()
-                    if name:
-                        return name
-            elif line.startswith('export const '):
-                parts = line.split('export const ')
-                if len(parts) > 1:
-                    name = parts[1].split('=')[0].strip()
-                    if name and name[0].isupper():
-                        return name
+            return True, base_name
+        
+        # Then from export statements; exported consts only count when capitalized
+        for match in _COMPONENT_NAME_RE.finditer(content):
+            default_name, const_name = match.groups()
+            if default_name is not None:
+                name = default_name.strip()
+                if name:
+                    return True, name
+            else:
+                name = const_name.strip()
+                if name and name[0].isupper():
+                    return True, name
         
-        return None
+        return True, None
 
-    def _extract_function_name(self, content: str) -> Optional[str]:
+    def _extract_function_name(self, lines: List[str]) -> Optional[str]:
         """Extract main function name from non-component files"""
-        lines = content.split('\n')
         for line in lines:
             line = line.strip()
             if line.startswith('export function '):
@@ -228,43 +345,18 @@ class ProjectProcessor:
 
     def _extract_dependencies(self, content: str) -> List[str]: 
         """Extract import dependencies from the file - FIXED VERSION"""
-        dependencies = []
-        lines = content.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Handle: import something from 'module'
-            if line.startswith('import ') and ' from ' in line:
-                try:
-                    # Use regex to extract the module name after 'from'
-                    from_match = re.search(r'from\s+["\']([^"\']+)["\']', line)
-                    if from_match:
-                        module = from_match.group(1)
-                        # Skip relative imports
-                        if not (module.startswith('./') or module.startswith('../')):
-                            dependencies.append(module)
-                except Exception as e:
-                    print(f"Error parsing import line: {line} - {e}")
-            
-            # Handle: import 'module' (direct imports)
-            elif line.startswith('import ') and not ' from ' in line and ('import "' in line or "import '" in line):
-                try:
-                    import_match = re.search(r'import\s+["\']([^"\']+)["\']', line)
-                    if import_match:
-                        module = import_match.group(1)
-                        if not (module.startswith('./') or module.startswith('../')):
-                            dependencies.append(module)
-                except Exception as e:
-                    print(f"Error parsing direct import: {line} - {e}")
+        dependencies = {
+            module for module in _IMPORT_LINE_RE.findall(content)
+            # Skip relative imports
+            if not module.startswith(('./', '../'))
+        }
         
-        # Remove duplicates and return
-        return list(set(dependencies))
+        return list(dependencies)
 
-    def _generate_description(self, content: str, filename: str, framework_type: str, is_component: bool) -> str:
+    def _generate_description(self, lines: List[str], filename: str, framework_type: str,
+                              is_component: bool, component_name: Optional[str] = None) -> str:
         """Generate a description for the code"""
         # Look for comments at the top
-        lines = content.split('\n')
         for line in lines[:10]:  # Check first 10 lines
             line = line.strip()
             if line.startswith('//') or line.startswith('/*') or line.startswith('*'):
@@ -274,7 +366,6 @@ class ProjectProcessor:
         
         # Generate based on file type and patterns
         if is_component:
-            component_name = self._extract_component_name(content, filename)
             return f"React component: {component_name or filename} ({framework_type})"
         elif 'api' in filename.lower() or 'api' in framework_type:
             return f"API endpoint: {filename} ({framework_type})"
@@ -290,7 +381,7 @@ class ProjectProcessor:
     def _process_json_file(self, file_path: Path, project_name: str, content: str) -> List[CodeVectorStore]:
         """Process JSON configuration files"""
         try:
-            data = json.loads(content)
+            data = _json_loads(content)
             
             # Special handling for different JSON files
             if file_path.name == 'package.json':
@@ -318,212 +409,272 @@ class ProjectProcessor:
             return []
 
 
+@lru_cache(maxsize=1)
+def _get_worker_processor() -> ProjectProcessor:
+    """The ProjectProcessor of a pool worker process, created on its first file"""
+    return ProjectProcessor()
+
+
+def _process_file_in_worker(file: Path, category: str, project_name: str) -> List[CodeVectorStore]:
+    """
+    Top-level entry point for the process pool, so only the file arguments are
+    pickled for each task instead of a bound ProjectProcessor method.
+    """
+    return _get_worker_processor()._process_file(file, category, project_name)
+
+
+# One client per persist directory, and one handle per collection, shared by every
+# RAGVectorStore in the process so the store on disk is only opened once
+_CLIENT_CACHE: Dict[str, chromadb.api.ClientAPI] = {}
+_COLLECTION_CACHE: Dict[Tuple[str, str], chromadb.Collection] = {}
+
+
+def _get_client(persist_directory: str):
+    """Return the cached PersistentClient for a directory, opening it on first use"""
+    persist_directory = os.path.abspath(persist_directory)
+    client = _CLIENT_CACHE.get(persist_directory)
+    if client is None:
+        client = _CLIENT_CACHE[persist_directory] = chromadb.PersistentClient(path=persist_directory)
+    return client
+
+
 class RAGVectorStore: 
 
     def __init__(self, collection_name: str = "narbtech_code", persist_directory: str = "./chroma_db"):
-         self.client = chromadb.PersistentClient(path=persist_directory)
+         self.client = _get_client(persist_directory)
          self.collection_name = collection_name
-         self.collection = None 
+         self._cache_key = (os.path.abspath(persist_directory), collection_name)
+         # Same model Chroma uses by default; held here so documents can be embedded in bulk
+         self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
          self._setup_collection()
 
-    def _setup_collection(self): 
+    @property
+    def collection(self) -> chromadb.Collection:
+        """The shared collection handle, reopened after any instance clears or deletes it"""
+        collection = _COLLECTION_CACHE.get(self._cache_key)
+        if collection is None:
+            collection = self._setup_collection()
+        return collection
+
+    def _setup_collection(self) -> chromadb.Collection: 
+        cached = _COLLECTION_CACHE.get(self._cache_key)
+        if cached is not None:
+            return cached
         try: 
-            self.collection = self.client.get_collection(name=self.collection_name)
+            collection = self.client.get_collection(
+                name=self.collection_name,
+                embedding_function=self.embedding_function
+            )
             print(f"Loaded existing collection: {self.collection_name}")
         except Exception as e: 
-            self.collection = self.client.create_collection(
+            collection = self.client.create_collection(
                 name=self.collection_name,
-                metadata={"description": "Narbtech code chunks for RAG"}
+                metadata=COLLECTION_METADATA,
+                embedding_function=self.embedding_function
             )
             print(f"Created new collection: {self.collection_name}")
+        _COLLECTION_CACHE[self._cache_key] = collection
+        return collection
 
     def clear_collection(self):
         """Clear all documents from the collection"""
         try:
             # Delete the collection and recreate it
-            self.client.delete_collection(name=self.collection_name)
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={"description": "Narbtech code chunks for RAG"}
-            )
+            self.delete_collection()
+            self._setup_collection()
             print(f"Cleared and recreated collection: {self.collection_name}")
         except Exception as e:
             print(f"Error clearing collection: {e}")
     
+    def delete_collection(self):
+        """Delete the collection; every instance sharing it reopens a new one on next use"""
+        # Dropped first, so no instance keeps a handle to the deleted collection
+        _COLLECTION_CACHE.pop(self._cache_key, None)
+        self.client.delete_collection(name=self.collection_name)
+    
     
     def _create_searchable_text(self, chunk: CodeVectorStore) -> str:
         """Create searchable text representation of code chunk"""
-        searchable_parts = [
-            f"Framework: {chunk.framework}",
-            f"Type: {chunk.file_type}",
-            f"Language: {chunk.language}",
-            f"Description: {chunk.description}",
-        ]
-        
-        if chunk.component_name:
-            searchable_parts.append(f"Component: {chunk.component_name}")
-        if chunk.function_name:
-            searchable_parts.append(f"Function: {chunk.function_name}")
-        if chunk.dependencies:
-            searchable_parts.append(f"Dependencies: {', '.join(chunk.dependencies)}")
-            
-        searchable_parts.append(f"Code:\n{chunk.content}")
-        
-        return "\n".join(searchable_parts)
+        return (
+            f"Framework: {chunk.framework}\n"
+            f"Type: {chunk.file_type}\n"
+            f"Language: {chunk.language}\n"
+            f"Description: {chunk.description}\n"
+            + (f"Component: {chunk.component_name}\n" if chunk.component_name else "")
+            + (f"Function: {chunk.function_name}\n" if chunk.function_name else "")
+            + (f"Dependencies: {', '.join(chunk.dependencies)}\n" if chunk.dependencies else "")
+            + f"Code:\n{chunk.content}"
+        )
     
-    def add_chunks(self, chunks: List[CodeVectorStore]): 
-        if not chunks: 
-            print("No chunks to add")
-            return 
+    def add_chunks(self, chunks: Iterable[CodeVectorStore]): 
+        print("Starting to process chunks...")
         
-        print(f"Starting to process {len(chunks)} chunks...")
+        chunk_iter = iter(chunks)
+        seen_ids = set()
+        total_chunks = 0
+        total_added = 0
+        batch_num = 0
         
-        documents = []
-        metadatas = []
-        ids = []
+        # Consume the chunks a batch at a time, so only one batch of documents is held in memory
+        while batch := list(islice(chunk_iter, INSERT_BATCH_SIZE)):
+            documents = []
+            metadatas = []
+            ids = []
 
-        for i, chunk in enumerate(chunks): 
-            try:
-                doc_text = self._create_searchable_text(chunk)
-                documents.append(doc_text)
-                
-                # Create metadata - ensure all values are JSON serializable
-                metadata = self._prepare_metadata(chunk)
-                metadatas.append(metadata)
-                
-                # Create unique ID
-                chunk_id = self._generate_chunk_id(chunk)
-                ids.append(chunk_id)
-                
-                if i < 3:  # Debug first few
-                    print(f"Chunk {i+1}: ID={chunk_id}, doc_length={len(doc_text)}")
+            for chunk in batch: 
+                i = total_chunks
+                total_chunks += 1
+                try:
+                    doc_text = self._create_searchable_text(chunk)
+                    
+                    # Create metadata - ensure all values are JSON serializable
+                    metadata = self._prepare_metadata(chunk)
+                    
+                    # Create unique ID
+                    chunk_id = self._generate_chunk_id(chunk)
+                    
+                    documents.append(doc_text)
+                    metadatas.append(metadata)
+                    ids.append(chunk_id)
                     
-            except Exception as e:
-                print(f"Error processing chunk {i}: {e}")
+                    if i < 3:  # Debug first few
+                        print(f"Chunk {i+1}: ID={chunk_id}, doc_length={len(doc_text)}")
+                        
+                except Exception as e:
+                    print(f"Error processing chunk {i}: {e}")
+                    continue
+            
+            # Remove duplicates, both within this batch and against earlier batches
+            unique_docs, unique_metas, unique_ids = self._remove_duplicates(documents, metadatas, ids, seen_ids)
+            if not unique_docs:
                 continue
+            
+            # Ids hash path and content, so a stored id means that exact chunk is already embedded
+            existing = set(self.collection.get(ids=unique_ids, include=[])['ids'])
+            if existing:
+                kept = [(doc, meta, doc_id) for doc, meta, doc_id in zip(unique_docs, unique_metas, unique_ids)
+                        if doc_id not in existing]
+                unique_docs = [doc for doc, _, _ in kept]
+                unique_metas = [meta for _, meta, _ in kept]
+                unique_ids = [doc_id for _, _, doc_id in kept]
+                print(f"Skipping {len(existing)} documents already in the collection")
+                if not unique_docs:
+                    continue
+            
+            # Embed the whole batch at once instead of per add() call
+            unique_embeddings = self._embed_documents(unique_docs)
+            batch_num += 1
+            total_added += self._add_batch(batch_num, unique_docs, unique_embeddings, unique_metas, unique_ids)
         
-        print(f"Prepared {len(documents)} documents for insertion")
-        
-        # Remove duplicates
-        unique_docs, unique_metas, unique_ids = self._remove_duplicates(documents, metadatas, ids)
-        print(f"After deduplication: {len(unique_docs)} unique documents")
-        
-        if not unique_docs:
-            print("No unique documents to add!")
+        if not total_chunks:
+            print("No chunks to add")
             return
         
-        # Add in smaller batches with error handling
-        batch_size = 10  # Smaller batches for debugging
-        total_added = 0
-        
-        for i in range(0, len(unique_docs), batch_size):
-            batch_docs = unique_docs[i:i+batch_size]
-            batch_metadata = unique_metas[i:i+batch_size]
-            batch_ids = unique_ids[i:i+batch_size]
-            
-            print(f"Adding batch {i//batch_size + 1}: {len(batch_docs)} documents")
-            
-            try:
-                self.collection.add(
-                    documents=batch_docs,
-                    metadatas=batch_metadata,
-                    ids=batch_ids
-                )
-                total_added += len(batch_docs)
-                print(f"✅ Successfully added batch {i//batch_size + 1}")
-                
-            except Exception as e:
-                print(f"❌ Error adding batch {i//batch_size + 1}: {e}")
-                print(f"Batch details: {len(batch_docs)} docs, {len(batch_metadata)} metadata, {len(batch_ids)} ids")
-                
-                # Try individual documents in this batch
-                for j, (doc, meta, doc_id) in enumerate(zip(batch_docs, batch_metadata, batch_ids)):
-                    try:
-                        print(f"  Trying individual document {j+1}: {doc_id}")
-                        self.collection.add(
-                            documents=[doc],
-                            metadatas=[meta],
-                            ids=[doc_id]
-                        )
-                        total_added += 1
-                        print(f"  ✅ Added individual document {doc_id}")
-                    except Exception as individual_error:
-                        print(f"  ❌ Failed individual document {doc_id}: {individual_error}")
-                        print(f"    Doc length: {len(doc)}")
-                        print(f"    Metadata keys: {list(meta.keys())}")
+        print(f"Processed {total_chunks} chunks, {len(seen_ids)} unique documents")
         
         # Verify what was actually added
         try:
             final_count = self.collection.count()
             print(f"Final collection count: {final_count}")
-            print(f"Successfully added {total_added} out of {len(chunks)} chunks")
+            print(f"Successfully added {total_added} out of {total_chunks} chunks")
         except Exception as e:
             print(f"Error getting final count: {e}")
     
+    def _add_batch(self, batch_num: int, batch_docs: List[str], batch_embeddings: List,
+                   batch_metadata: List[Dict], batch_ids: List[str]) -> int:
+        """Add one batch, falling back to single documents when the batch fails; returns how many were added"""
+        print(f"Adding batch {batch_num}: {len(batch_docs)} documents")
+        
+        try:
+            self.collection.add(
+                documents=batch_docs,
+                embeddings=batch_embeddings,
+                metadatas=batch_metadata,
+                ids=batch_ids
+            )
+            print(f"✅ Successfully added batch {batch_num}")
+            return len(batch_docs)
+            
+        except Exception as e:
+            print(f"❌ Error adding batch {batch_num}: {e}")
+            print(f"Batch details: {len(batch_docs)} docs, {len(batch_metadata)} metadata, {len(batch_ids)} ids")
+        
+        # Try individual documents in this batch
+        added = 0
+        for j, (doc, embedding, meta, doc_id) in enumerate(zip(batch_docs, batch_embeddings, batch_metadata, batch_ids)):
+            try:
+                print(f"  Trying individual document {j+1}: {doc_id}")
+                self.collection.add(
+                    documents=[doc],
+                    embeddings=[embedding],
+                    metadatas=[meta],
+                    ids=[doc_id]
+                )
+                added += 1
+                print(f"  ✅ Added individual document {doc_id}")
+            except Exception as individual_error:
+                print(f"  ❌ Failed individual document {doc_id}: {individual_error}")
+                print(f"    Doc length: {len(doc)}")
+                print(f"    Metadata keys: {list(meta.keys())}")
+        return added
+    
+    def embed_queries(self, queries: List[str]) -> List:
+        """Embed search queries with the collection's model, for collection.query(query_embeddings=...)"""
+        return self._embed_documents(queries)
+    
+    def _embed_documents(self, documents: List[str]) -> List:
+        """Embed documents in fixed-size batches before they are added"""
+        embeddings = []
+        for i in range(0, len(documents), EMBED_BATCH_SIZE):
+            embeddings.extend(self.embedding_function(documents[i:i+EMBED_BATCH_SIZE]))
+        return embeddings
+    
     def _prepare_metadata(self, chunk: CodeVectorStore) -> Dict:
         """Prepare metadata ensuring all values are JSON serializable"""
+        # Every field is already a str, so no conversion is needed
         metadata = {
-            'file_path': str(chunk.file_path),
-            'project_name': str(chunk.project_name),
-            'file_type': str(chunk.file_type),
-            'language': str(chunk.language),
-            'framework': str(chunk.framework),
-            'description': str(chunk.description),
+            'file_path': chunk.file_path,
+            'project_name': chunk.project_name,
+            'file_type': chunk.file_type,
+            'language': chunk.language,
+            'framework': chunk.framework,
+            'description': chunk.description,
         }
         
-        # Add optional fields if they exist
-        if chunk.function_name:
-            metadata['function_name'] = str(chunk.function_name)
-        if chunk.component_name:
-            metadata['component_name'] = str(chunk.component_name)
-        if chunk.dependencies:
-            # Join dependencies into a string to avoid list serialization issues
-            metadata['dependencies'] = ', '.join(str(dep) for dep in chunk.dependencies)
+        # Add optional fields if they exist; dependencies are joined into a string
+        # to avoid list serialization issues
+        optional = (
+            ('function_name', chunk.function_name),
+            ('component_name', chunk.component_name),
+            ('dependencies', ', '.join(chunk.dependencies)),
+        )
+        metadata.update((key, value) for key, value in optional if value)
         
         return metadata
     
-    def _remove_duplicates(self, documents, metadatas, ids):
-        """Remove duplicate IDs"""
-        seen_ids = set()
-        unique_docs = []
-        unique_metas = []
-        unique_ids = []
-        
-        for doc, meta, doc_id in zip(documents, metadatas, ids):
-            if doc_id not in seen_ids:
-                seen_ids.add(doc_id)
-                unique_docs.append(doc)
-                unique_metas.append(meta)
-                unique_ids.append(doc_id)
-            else:
-                print(f"Skipping duplicate ID: {doc_id}")
-        
-        return unique_docs, unique_metas, unique_ids
-    
-    def _create_searchable_text(self, chunk: CodeVectorStore) -> str:
-        """Create searchable text representation of code chunk"""
-        searchable_parts = [
-            f"Framework: {chunk.framework}",
-            f"Type: {chunk.file_type}",
-            f"Language: {chunk.language}",
-            f"Description: {chunk.description}",
-        ]
-        
-        if chunk.component_name:
-            searchable_parts.append(f"Component: {chunk.component_name}")
-        if chunk.function_name:
-            searchable_parts.append(f"Function: {chunk.function_name}")
-        if chunk.dependencies:
-            searchable_parts.append(f"Dependencies: {', '.join(chunk.dependencies)}")
-            
-        searchable_parts.append(f"Code:\n{chunk.content}")
-        
-        return "\n".join(searchable_parts)
+    def _remove_duplicates(self, documents, metadatas, ids, seen_ids: Optional[set] = None):
+        """Remove duplicate IDs, including any already in seen_ids (which is then updated)"""
+        # Equal ids hash the same path and content, so which copy is kept does not matter
+        unique = dict(zip(ids, zip(documents, metadatas)))
+        if seen_ids is not None:
+            for doc_id in seen_ids.intersection(unique):
+                del unique[doc_id]
+            seen_ids.update(unique)
+        skipped = len(ids) - len(unique)
+        if skipped:
+            print(f"Skipping {skipped} duplicate IDs")
+        
+        unique_docs = [doc for doc, _ in unique.values()]
+        unique_metas = [meta for _, meta in unique.values()]
+        return unique_docs, unique_metas, list(unique)
 
     def _generate_chunk_id(self, chunk: CodeVectorStore) -> str:
-        path_hash = hashlib.md5(chunk.file_path.encode()).hexdigest()[:8]
-        content_hash = hashlib.md5(chunk.content.encode()).hexdigest()[:8]
-        return f"{chunk.project_name}_{chunk.framework}_{path_hash}_{content_hash}"
+        # One 128-bit hash over path and content instead of two truncated 32-bit ones
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(chunk.file_path.encode())
+        digest.update(b'\x00')
+        digest.update(chunk.content.encode())
+        return f"{chunk.project_name}_{chunk.framework}_{digest.hexdigest()}"
 
     def search(self, query: str, n_results: int = 5, 
               framework_filter: Optional[str] = None,
@@ -561,42 +712,48 @@ class RAGRetriever:
 
     def retrieve_context(self, user_request: str, max_chunks: int = 5) -> List[str]: 
         """Retrieve context from vector store"""
-        all_results = []
+        searches = []
+        tags = self._keyword_tags(user_request)
         
         # Search for UI/component related requests
-        if self._mentions_ui(user_request):
-            ui_results = self.vector_store.search(
-                query=f"{user_request} React component UI",
+        if 'ui' in tags:
+            searches.append(dict(
+                query=f"{user_request} {AREA_QUERY_TERMS['ui']}",
                 n_results=3,
                 file_type_filter="component"
-            )
-            all_results.extend(ui_results)
+            ))
         
         # Search for backend functionality
-        if self._mentions_backend(user_request):
-            backend_results = self.vector_store.search(
-                query=f"{user_request} function API",
+        if 'backend' in tags:
+            searches.append(dict(
+                query=f"{user_request} {AREA_QUERY_TERMS['backend']}",
                 n_results=3,
                 framework_filter="convex"
-            )
-            all_results.extend(backend_results)
+            ))
         
         # Search for authentication related code
-        if self._mentions_auth(user_request):
-            auth_results = self.vector_store.search(
-                query=f"{user_request} authentication login",
+        if 'auth' in tags:
+            searches.append(dict(
+                query=f"{user_request} {AREA_QUERY_TERMS['auth']}",
                 n_results=2,
                 framework_filter="clerk-auth"
-            )
-            all_results.extend(auth_results)
+            ))
         
-        # General search if we don't have enough results
+        # General search, used to top up when the targeted ones return too little. It is asked
+        # for the full max_chunks so it can run alongside them instead of after them.
+        searches.append(dict(query=user_request, n_results=max_chunks))
+        
+        # The searches are independent, so they run concurrently
+        if len(searches) == 1:
+            search_results = [self.vector_store.search(**searches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=len(searches)) as executor:
+                search_results = list(executor.map(lambda kwargs: self.vector_store.search(**kwargs), searches))
+        
+        *targeted_results, general_results = search_results
+        all_results = [result for results in targeted_results for result in results]
         if len(all_results) < max_chunks:
-            general_results = self.vector_store.search(
-                query=user_request,
-                n_results=max_chunks - len(all_results)
-            )
-            all_results.extend(general_results)
+            all_results.extend(general_results[:max_chunks - len(all_results)])
         
         # Extract and format contexts
         contexts = []
@@ -605,20 +762,21 @@ class RAGRetriever:
         
         return contexts
 
+    def _keyword_tags(self, request: str) -> set:
+        """Return which of 'ui', 'backend' and 'auth' the request mentions"""
+        return keyword_tags(request)
+
     def _mentions_ui(self, request: str) -> bool:
         """Check if request mentions UI elements"""
-        ui_terms = ['page', 'component', 'form', 'button', 'ui', 'interface', 'layout', 'design', 'dashboard', 'screen']
-        return any(term in request.lower() for term in ui_terms)
+        return 'ui' in self._keyword_tags(request)
     
     def _mentions_backend(self, request: str) -> bool:
         """Check if request mentions backend functionality"""
-        backend_terms = ['api', 'database', 'function', 'store', 'save', 'fetch', 'query', 'mutation', 'convex']
-        return any(term in request.lower() for term in backend_terms)
+        return 'backend' in self._keyword_tags(request)
     
     def _mentions_auth(self, request: str) -> bool:
         """Check if request mentions authentication"""
-        auth_terms = ['auth', 'login', 'signin', 'signup', 'user', 'authentication', 'clerk']
-        return any(term in request.lower() for term in auth_terms)
+        return 'auth' in self._keyword_tags(request)
     
     def _format_context(self, result: Dict) -> str:
         """Format search result into context string"""
@@ -0,0 +1,12 @@
+from langgraph.types import Send
+from src.state import AgentState
+from src.nodes.task_dispatcher import ready_tasks
+
+
+def route_tasks(state: AgentState):
+    """Route logic after the task dispatcher: one worker branch per ready task, or aggregate"""
+    wave = ready_tasks(state)
+    if not wave:
+        return "aggregator"
+    context = state.get('retrieved_context', [])
+    return [Send("worker", {"task": task, "context": context}) for task in wave]
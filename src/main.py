@@ -1,3 +1,6 @@
+import asyncio
+import logging
+from functools import lru_cache
 from typing import TypedDict, List, Union
 from langgraph.graph import StateGraph, START, END
 from langchain_core.messages import HumanMessage, AIMessage
@@ -6,6 +9,7 @@ from src.state import AgentState, ValidationReport, Task
 from src.nodes.aggregator import aggregator_node
 from src.nodes.resource_monitor import resource_monitor_node
 from src.nodes.worker import worker_node
+from src.nodes.task_dispatcher import task_dispatcher_node
 from src.nodes.tester import tester
 from src.nodes.manager import manager_node
 from src.nodes.manager_planning import manager_planning_node
@@ -13,63 +17,104 @@ from src.nodes.retriever import retriever_node
 
 from src.edges.route_after_tester import route_after_tester
 from src.edges.route_after_manager import route_after_manager
+from src.edges.route_tasks import route_tasks
+from src.cache.run_cache import RunCache, run_fingerprint
+from src.config import setup_logging
 
+logger = logging.getLogger(__name__)
 
-graph = StateGraph(AgentState)
-
-graph.add_node("manager", manager_node)
-graph.add_node("resource_monitor", resource_monitor_node)
-graph.add_node("worker", worker_node)
-graph.add_node("tester", tester)
-graph.add_node("aggregator", aggregator_node)
-graph.add_node("manager_planning", manager_planning_node)
-graph.add_node("retriever", retriever_node)
-
-graph.set_entry_point("manager")
-graph.add_conditional_edges(
-    "manager",
-    route_after_manager, 
-    {
-        "clarify": END,  # Pause for user input
-        "plan": "retriever",
-        "replan": "manager_planning"
-    }
-
-)
-
-graph.add_edge("retriever", "manager_planning")
-graph.add_edge("manager_planning", "resource_monitor")
-graph.add_edge("resource_monitor", "worker") 
-graph.add_edge("worker", "aggregator")
-
-graph.add_conditional_edges(
-    "tester",
-    route_after_tester, 
-    {
-        "passed": END,
-        "failed": "manager_planning"
-    }
-)
-
-graph.compile()
-
-initial_state = AgentState(
-    user_request="Create a task management web application with user authentication",
-    clarified_request="",
-    is_clarification_needed=False,
-    clarification_questions=[],
-    retrieved_context=[],
-    task_plan=[],
-    completed_tasks=[],
-    final_deliverable="",
-    validation_report=ValidationReport(status="", details=""),
-    cost_estimate=0.0,
-    current_cost=0.0,
-    user_interrupt=None,
-    manager_analysis=None
-)
-
-compiled_graph = graph.compile()
-result = compiled_graph.invoke(initial_state) 
-print("Reached conclusion")
-print(f"Final state: {result}")
+
+@lru_cache(maxsize=1)
+def build_graph():
+    """
+    Builds and compiles the workflow once; later calls reuse the compiled graph.
+    """
+    graph = StateGraph(AgentState)
+
+    graph.add_node("manager", manager_node)
+    graph.add_node("resource_monitor", resource_monitor_node)
+    graph.add_node("task_dispatcher", task_dispatcher_node)
+    graph.add_node("worker", worker_node)
+    graph.add_node("tester", tester)
+    graph.add_node("aggregator", aggregator_node)
+    graph.add_node("manager_planning", manager_planning_node)
+    graph.add_node("retriever", retriever_node)
+
+    graph.set_entry_point("manager")
+    graph.add_conditional_edges(
+        "manager",
+        route_after_manager, 
+        {
+            "clarify": END,  # Pause for user input
+            "plan": "retriever",
+            "replan": "manager_planning"
+        }
+
+    )
+
+    graph.add_edge("retriever", "manager_planning")
+    # The cost estimate is only reported, so it runs beside dispatching instead of before it
+    graph.add_edge("manager_planning", "resource_monitor")
+    graph.add_edge("manager_planning", "task_dispatcher")
+    graph.add_edge("resource_monitor", END)
+    # Each wave of ready tasks fans out to parallel workers; once the wave is
+    # done the dispatcher sends the tasks it unlocked, or moves on to aggregate
+    graph.add_conditional_edges("task_dispatcher", route_tasks, ["worker", "aggregator"])
+    graph.add_edge("worker", "task_dispatcher")
+    graph.add_edge("aggregator", "tester")
+
+    graph.add_conditional_edges(
+        "tester",
+        route_after_tester, 
+        {
+            "passed": END,
+            "failed": "manager_planning"
+        }
+    )
+
+    return graph.compile()
+
+
+async def run_graph(initial_state: AgentState) -> AgentState:
+    """
+    Runs the workflow, reusing the final state of an earlier run of the same
+    request against the same code when one is cached.
+    """
+    fingerprint = run_fingerprint(initial_state["user_request"])
+    with RunCache() as cache:
+        cached = cache.get(fingerprint)
+    if cached is not None:
+        logger.info("♻️ Reusing cached result for this request")
+        return cached
+
+    # The connection is not held open while the graph runs
+    result = await build_graph().ainvoke(initial_state)
+    with RunCache() as cache:
+        cache.set(fingerprint, result)
+    return result
+
+
+if __name__ == "__main__":
+    setup_logging()
+    initial_state = AgentState(
+        user_request="Create a task management web application with user authentication",
+        clarified_request="",
+        is_clarification_needed=False,
+        clarification_questions=[],
+        retrieved_context=[],
+        task_plan=[],
+        completed_tasks=[],
+        completed_task_ids=set(),
+        finished_task_ids=set(),
+        final_deliverable="",
+        validation_report=ValidationReport(status="", details=""),
+        cost_estimate=0.0,
+        current_cost=0.0,
+        user_interrupt=None,
+        manager_analysis=None
+    )
+
+    # The worker node is async, so the graph has to run on an event loop
+    result = asyncio.run(run_graph(initial_state))
+    print("Reached conclusion")
+    print(f"Final state: {result}")
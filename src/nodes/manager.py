@@ -1,14 +1,13 @@
+import logging
 from src.state import AgentState
-from src.config import llm
-from langchain.prompts import PromptTemplate
-from langchain.schema import HumanMessage
+from functools import lru_cache
+from src.config import ainvoke_llm, get_llm
+from src.cache.llm_cache import CachingLLMClient
 
-def manager_node(state:AgentState) -> AgentState: 
-    #First, let's just check if clarification is needed 
-    user_request = state["user_request"]
-    prompt = PromptTemplate(
-        input_variables = ["user_request"],
-        template = """
+logger = logging.getLogger(__name__)
+
+# Built once at import; the node only formats it with str.format
+clarification_prompt = """
         Based on the user request: {user_request}, determine if clarification is needed in 
         order to proceed with the task, particularly if it involves: 
         - Technical requirements (frameworks, databases, etc.)
@@ -20,18 +19,31 @@ def manager_node(state:AgentState) -> AgentState:
         If clarification needed, generate specific questions.
         If clear enough, provide a clarified, detailed version.
         """
-    )
-    formatted_prompt = prompt.format(user_request=user_request)
-    response = llm([HumanMessage(content=formatted_prompt)]).content
-    print(response)
+
+@lru_cache(maxsize=1)
+def get_clarification_llm() -> CachingLLMClient:
+    """Shared LLM with a response cache, so re-running the same request skips the call"""
+    return CachingLLMClient(get_llm())
+
+async def manager_node(state:AgentState) -> AgentState: 
+    #First, let's just check if clarification is needed 
+    user_request = state["user_request"]
+    formatted_prompt = clarification_prompt.format(user_request=user_request)
+    # Awaited on the graph's event loop instead of blocking a worker thread
+    response = (await ainvoke_llm(
+        formatted_prompt,
+        llm=get_clarification_llm(),
+        semantic_text=user_request
+    )).content
+    logger.info(response)
     if("Clarification needed" in response):
         state["is_clarification_needed"] = True
         state["clarification_questions"] = response.split("\n")
-        print("❓ Clarification needed. Questions generated:")
+        logger.info("❓ Clarification needed. Questions generated:")
         for question in state["clarification_questions"]:
-            print(f"  - {question}")
+            logger.info("  - %s", question)
     else:
         state["is_clarification_needed"] = False
         state["clarified_request"] = response.strip()
-        print(f"✅ Clarified request: {state['clarified_request']}")
+        logger.info("✅ Clarified request: %s", state['clarified_request'])
     return state
\ No newline at end of file
@@ -1,19 +1,34 @@
-from src.state import AgentState
+import logging
+from src.state import AgentState, RESET
 from src.state import Task
-from src.config import llm
-from langchain.prompts import PromptTemplate
+from src.config import PROMPT_CACHE_CONTROL, get_llm
+from langchain_core.messages import SystemMessage, HumanMessage
 import json
-from typing import List, Dict, Any
+import re
+from contextlib import aclosing
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 
-# Prompt template for task generation
-TASK_PLANNING_TEMPLATE = """You are an AI Project Manager responsible for breaking down user requests into specific, actionable tasks. Your goal is to create a detailed task plan that can be executed by specialized AI workers.
+logger = logging.getLogger(__name__)
 
-Context:
-{context}
+# orjson parses noticeably faster when it is installed; its decode error subclasses json's
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-User Request: {request}
+# Markdown code fences (```json ... ```) that models often wrap the JSON plan in
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.M)
+# Start of the task array, and the whitespace and commas between its items, in a partial response
+_TASKS_ARRAY_RE = re.compile(r'"tasks"\s*:\s*\[')
+_ARRAY_SEPARATOR_RE = re.compile(r"[\s,]*")
+_JSON_DECODER = json.JSONDecoder()
 
-{replanning_context}
+# Static planning instructions, sent as the system message. They never change between
+# calls, so the provider can serve this prefix from its prompt cache; being plain text
+# (not a template) the JSON braces below need no escaping.
+TASK_PLANNING_SYSTEM_PROMPT = """You are an AI Project Manager responsible for breaking down user requests into specific, actionable tasks. Your goal is to create a detailed task plan that can be executed by specialized AI workers.
 
 Instructions:
 1. Break down the request into logical, sequential tasks
@@ -47,10 +62,59 @@ Response Format:
     "reasoning": "Explanation of the task breakdown and dependencies"
 }"""
 
-task_planning_prompt = PromptTemplate(
-    template=TASK_PLANNING_TEMPLATE,
-    input_variables=["context", "request", "replanning_context"]
-)
+# Per-request part of the prompt, sent as the human message after the cached prefix
+TASK_PLANNING_TEMPLATE = """Context:
+{context}
+
+User Request: {request}
+
+{replanning_context}"""
+
+# System message marked as a cacheable prefix when the model supports it; other
+# providers (e.g. Gemini) reject or mangle cache_control blocks, so they get plain text
+if PROMPT_CACHE_CONTROL:
+    TASK_PLANNING_SYSTEM_MESSAGE = SystemMessage(content=[{
+        "type": "text",
+        "text": TASK_PLANNING_SYSTEM_PROMPT,
+        "cache_control": {"type": "ephemeral"}
+    }])
+else:
+    TASK_PLANNING_SYSTEM_MESSAGE = SystemMessage(content=TASK_PLANNING_SYSTEM_PROMPT)
+
+# Distinct (plan, interrupt) pairs whose replanning context is kept
+REPLANNING_CONTEXT_CACHE_SIZE = 64
+
+# Built once rather than on every validation call
+REQUIRED_TASK_FIELDS = frozenset({'id', 'role', 'goal', 'status', 'dependencies'})
+VALID_ROLES = frozenset({'ArchitectWorker', 'BackendWorker', 'FrontendWorker', 'TestWorker', 'UIWorker', 'DevOpsWorker'})
+
+def validate_task(task: Dict[str, Any], task_ids: set) -> None:
+    """
+    Validates one task of a plan, given the ids of the tasks before it (which it adds to).
+    Raises ValueError if invalid.
+    """
+    # Check required fields
+    if not REQUIRED_TASK_FIELDS <= task.keys():
+        raise ValueError(f"Task missing required fields: {set(REQUIRED_TASK_FIELDS - task.keys())}")
+    
+    # Validate ID is unique and positive integer
+    if not isinstance(task['id'], int) or task['id'] < 1:
+        raise ValueError(f"Invalid task ID: {task['id']}")
+    if task['id'] in task_ids:
+        raise ValueError(f"Duplicate task ID: {task['id']}")
+    task_ids.add(task['id'])
+    
+    # Validate role
+    if task['role'] not in VALID_ROLES:
+        raise ValueError(f"Invalid role '{task['role']}' for task {task['id']}")
+    
+    # Validate dependencies
+    dependencies = task['dependencies']
+    for dep in dependencies:
+        if not isinstance(dep, int) or dep < 1:
+            raise ValueError(f"Invalid dependency ID {dep} in task {task['id']}")
+    if max(dependencies, default=0) >= task['id']:
+        raise ValueError(f"Task {task['id']} cannot depend on future task {max(dependencies)}")
 
 def validate_task_plan(tasks: List[Dict[str, Any]]) -> bool:
     """
@@ -62,35 +126,66 @@ def validate_task_plan(tasks: List[Dict[str, Any]]) -> bool:
     Returns:
         bool: True if valid, raises ValueError if invalid
     """
-    valid_roles = {'ArchitectWorker', 'BackendWorker', 'FrontendWorker', 'TestWorker', 'UIWorker', 'DevOpsWorker'}
     task_ids = set()
-    
     for task in tasks:
-        # Check required fields
-        required_fields = {'id', 'role', 'goal', 'status', 'dependencies'}
-        if not all(field in task for field in required_fields):
-            raise ValueError(f"Task missing required fields: {required_fields - set(task.keys())}")
-        
-        # Validate ID is unique and positive integer
-        if not isinstance(task['id'], int) or task['id'] < 1:
-            raise ValueError(f"Invalid task ID: {task['id']}")
-        if task['id'] in task_ids:
-            raise ValueError(f"Duplicate task ID: {task['id']}")
-        task_ids.add(task['id'])
-        
-        # Validate role
-        if task['role'] not in valid_roles:
-            raise ValueError(f"Invalid role '{task['role']}' for task {task['id']}")
-        
-        # Validate dependencies
-        for dep in task['dependencies']:
-            if not isinstance(dep, int) or dep < 1:
-                raise ValueError(f"Invalid dependency ID {dep} in task {task['id']}")
-            if dep >= task['id']:
-                raise ValueError(f"Task {task['id']} cannot depend on future task {dep}")
-    
+        validate_task(task, task_ids)
     return True
 
+class TaskStreamParser:
+    """
+    Incrementally pulls task objects out of a streamed plan response. Each call to
+    feed() returns the tasks of the "tasks" array whose JSON object has closed since
+    the previous call, so they can be validated while the rest is still arriving.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        # Text not consumed yet: before the array opens, whatever may still hold its
+        # start; after, everything following the last task taken from it
+        self._tail = ""
+        self._in_array = False
+        self._done = False
+
+    @property
+    def text(self) -> str:
+        """The whole response received so far"""
+        return "".join(self._chunks)
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self._chunks.append(text)
+        if self._done:
+            return []
+        self._tail += text
+        if not self._in_array:
+            match = _TASKS_ARRAY_RE.search(self._tail)
+            if not match:
+                # Keep only the part that could still turn into the start of the array
+                start = self._tail.rfind('"tasks"')
+                self._tail = self._tail[start:] if start != -1 else self._tail[-len('"tasks'):]
+                return []
+            self._tail = self._tail[match.end():]
+            self._in_array = True
+        elif '}' not in text:
+            # Only a closing brace can complete the next task object
+            return []
+
+        tasks = []
+        while True:
+            pos = _ARRAY_SEPARATOR_RE.match(self._tail).end()
+            if pos == len(self._tail):
+                break
+            if self._tail[pos] == ']':
+                self._done = True
+                break
+            try:
+                task, end = _JSON_DECODER.raw_decode(self._tail, pos)
+            except json.JSONDecodeError:
+                # The object has not closed yet
+                break
+            tasks.append(task)
+            self._tail = self._tail[end:]
+        return tasks
+
 def prepare_replanning_context(state: AgentState) -> str:
     """
     Prepares context string for replanning scenarios.
@@ -103,17 +198,25 @@ def prepare_replanning_context(state: AgentState) -> str:
     """
     if not state.get('user_interrupt'):
         return "Initial Planning: Create a new task plan from scratch."
-        
-    existing_tasks = state.get('task_plan', [])
+    
+    # Only the fields that appear in the text, so repeated replans of an unchanged plan hit the cache
+    task_summary = tuple(
+        (task['id'], task['status'], task['role'], task['goal'], tuple(task['dependencies']))
+        for task in state.get('task_plan', [])
+    )
+    return _build_replanning_context(task_summary, str(state['user_interrupt']))
+
+@lru_cache(maxsize=REPLANNING_CONTEXT_CACHE_SIZE)
+def _build_replanning_context(task_summary: Tuple[Tuple, ...], user_interrupt: str) -> str:
     context = ["Replanning Required: User interrupt received.", 
-               f"Original plan had {len(existing_tasks)} tasks.",
+               f"Original plan had {len(task_summary)} tasks.",
                "Current task statuses:"]
     
-    for task in existing_tasks:
-        deps = f" (depends on: {task['dependencies']})" if task['dependencies'] else ""
-        context.append(f"- Task {task['id']}: {task['status']} - {task['role']}: {task['goal']}{deps}")
+    for task_id, status, role, goal, dependencies in task_summary:
+        deps = f" (depends on: {list(dependencies)})" if dependencies else ""
+        context.append(f"- Task {task_id}: {status} - {role}: {goal}{deps}")
     
-    context.append(f"\nUser Interrupt: {state['user_interrupt']}")
+    context.append(f"\nUser Interrupt: {user_interrupt}")
     return "\n".join(context)
 
 def create_task_objects(task_data: List[Dict[str, Any]]) -> List[Task]:
@@ -141,7 +244,7 @@ def create_task_objects(task_data: List[Dict[str, Any]]) -> List[Task]:
     ]
 
 
-def manager_planning_node(state: AgentState) -> AgentState:
+async def manager_planning_node(state: AgentState) -> AgentState:
     """
     This function processes the agent's state and returns it with an updated task plan.
     
@@ -155,48 +258,64 @@ def manager_planning_node(state: AgentState) -> AgentState:
         # Prepare context and request information
         context = "\n".join(state.get('retrieved_context', ["No additional context available."]))
         request = state.get('clarified_request', state.get('user_request', ''))
+        user_interrupt = state.get('user_interrupt')
         replanning_context = prepare_replanning_context(state)
         
-        # Generate task plan using LLM
-        response = llm.invoke(
-            task_planning_prompt.format(
+        # Stream the task plan from the LLM, validating each task as soon as its object closes
+        parser = TaskStreamParser()
+        task_ids = set()
+        stream = get_llm().astream([
+            TASK_PLANNING_SYSTEM_MESSAGE,
+            HumanMessage(content=TASK_PLANNING_TEMPLATE.format(
                 context=context,
                 request=request,
                 replanning_context=replanning_context
-            )
-        )
+            ))
+        ])
+        # Leaving the block early on an invalid task closes the stream, cancelling the request
+        async with aclosing(stream):
+            async for chunk in stream:
+                text = chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+                for task in parser.feed(text):
+                    validate_task(task, task_ids)
         
         # Parse LLM response
         try:
-            result = json.loads(response.content)
+            result = _json_loads(_CODE_FENCE_RE.sub("", parser.text.strip()))
             tasks = result['tasks']
             reasoning = result.get('reasoning', 'No reasoning provided')
         except (json.JSONDecodeError, KeyError) as e:
             raise ValueError(f"Failed to parse LLM response: {str(e)}")
         
-        # Validate task plan
+        # Validate the complete plan too, in case the stream parser could not find the task array
         validate_task_plan(tasks)
         
         # Convert to Task objects
         task_objects = create_task_objects(tasks)
         
         # Update state
-        print(f"\n📋 {'REPLANNING' if state.get('user_interrupt') else 'INITIAL PLANNING'}")
-        print(f"LLM Reasoning: {reasoning}")
-        print(f"Generated {len(task_objects)} tasks:")
+        logger.info("\n📋 %s", 'REPLANNING' if user_interrupt else 'INITIAL PLANNING')
+        logger.info("LLM Reasoning: %s", reasoning)
+        logger.info("Generated %d tasks:", len(task_objects))
         
         for task in task_objects:
-            deps = f" (depends on: {task['dependencies']})" if task['dependencies'] else ""
-            print(f"  {task['id']}. {task['role']}: {task['goal']}{deps}")
+            if task['dependencies']:
+                logger.info("  %s. %s: %s (depends on: %s)", task['id'], task['role'], task['goal'], task['dependencies'])
+            else:
+                logger.info("  %s. %s: %s", task['id'], task['role'], task['goal'])
         
         state['task_plan'] = task_objects
-        if state.get('user_interrupt'):
+        # Ids restart at 1, so results of the previous plan must not count for this one
+        state['completed_tasks'] = RESET
+        state['finished_task_ids'] = RESET
+        state['completed_task_ids'] = RESET
+        if user_interrupt:
             state['user_interrupt'] = None  # Clear the interrupt
             
         return state
         
     except Exception as e:
-        print(f"❌ Error in task planning: {str(e)}")
+        logger.error("❌ Error in task planning: %s", e)
         # Return state with empty task plan in case of error
         state['task_plan'] = []
         return state
\ No newline at end of file
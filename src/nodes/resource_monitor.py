@@ -1,18 +1,25 @@
+import logging
 from src.state import AgentState
 
-def resource_monitor_node(state: AgentState) -> AgentState:
+logger = logging.getLogger(__name__)
+
+def resource_monitor_node(state: AgentState) -> dict:
+    """
+    Estimates the cost of the plan. Runs alongside the task dispatcher, so it only
+    returns the estimate; writing back the whole state would clash with the
+    dispatcher's update in the same step.
+    """
     active_tasks = [task for task in state.get('task_plan', []) if task['status'] != 'cancelled']
     base_cost_per_task = 2.50  # Simulated cost per task
     estimated_cost = len(active_tasks) * base_cost_per_task
     
-    state['cost_estimate'] = estimated_cost
-    state['current_cost'] = state.get('current_cost', 0)
+    current_cost = state.get('current_cost', 0)
     
-    print(f"💰 Cost Analysis:")
-    print(f"  Active tasks: {len(active_tasks)}")
-    print(f"  Estimated cost: ${estimated_cost:.2f}")
-    print(f"  Current spend: ${state['current_cost']:.2f}")
+    logger.info("💰 Cost Analysis:")
+    logger.info("  Active tasks: %d", len(active_tasks))
+    logger.info("  Estimated cost: $%.2f", estimated_cost)
+    logger.info("  Current spend: $%.2f", current_cost)
     
     if estimated_cost > 20:
-        print(f"  ⚠️  Warning: Estimated cost exceeds $20 threshold")
-    return state
\ No newline at end of file
+        logger.warning("  ⚠️  Warning: Estimated cost exceeds $20 threshold")
+    return {'cost_estimate': estimated_cost}
@@ -1,26 +1,74 @@
+import logging
+from functools import lru_cache
+from typing import List
 from src.state import AgentState
 
+logger = logging.getLogger(__name__)
+
+# Chunks retrieved for each query sent to the vector store
+RETRIEVER_MAX_CHUNKS = 8
+
+
+@lru_cache(maxsize=1)
+def get_retriever():
+    """
+    Returns the process-wide retriever over the code knowledge base.
+    Imported lazily so building the graph does not load Chroma or the embedding model.
+    """
+    from src.create_vectorstore import RAGVectorStore
+    from src.simple_rag import SimpleRAGRetriever
+
+    return SimpleRAGRetriever(RAGVectorStore())
+
+
+def build_queries(request: str) -> List[str]:
+    """
+    The clarified request, plus one query per area (UI, backend, auth) it mentions.
+    The task plan does not exist yet when the retriever runs, so the request is all there is.
+    """
+    from src.create_vectorstore import AREA_QUERY_TERMS, keyword_tags
+
+    tags = keyword_tags(request)
+    return [request] + [f"{request} {terms}" for tag, terms in AREA_QUERY_TERMS.items() if tag in tags]
+
+
 def retriever_node(state: AgentState) -> AgentState:
     """
     A node that retrieves information from a data source.
-    
+
     Args:
         state (AgentState): The current state of the agent.
-        
+
     Returns:
         AgentState: The updated state after retrieval.
     """
-    # Placeholder: Simulate retrieving relevant context
-    simulated_context = [
-        f"Similar project: {state['clarified_request'][:30]}... implementation pattern",
-        "Code snippet: FastAPI route structure for REST APIs",
-        "Best practice: Database schema design for user management",
-        "Template: React component structure for dashboards"
-    ]
-    
-    state['retrieved_context'] = simulated_context
-    print(f"📚 Retrieved {len(simulated_context)} relevant context items:")
-    for i, context in enumerate(simulated_context, 1):
-        print(f"  {i}. {context}")
-    
+    request = state['clarified_request']
+    try:
+        queries = build_queries(request)
+        batch_contexts = get_retriever().retrieve_contexts_batch(queries, max_chunks=RETRIEVER_MAX_CHUNKS)
+    except Exception as e:
+        logger.warning("⚠️ Vector store unavailable, using placeholder context: %s", e)
+        batch_contexts = []
+
+    # Queries overlap, so keep the first copy of each chunk in query order
+    retrieved_context = list(dict.fromkeys(
+        context for contexts in batch_contexts for context in contexts
+    ))
+
+    if not retrieved_context:
+        # Placeholder: Simulate retrieving relevant context
+        retrieved_context = [
+            f"Similar project: {request[:30]}... implementation pattern",
+            "Code snippet: FastAPI route structure for REST APIs",
+            "Best practice: Database schema design for user management",
+            "Template: React component structure for dashboards"
+        ]
+
+    state['retrieved_context'] = retrieved_context
+    logger.info("📚 Retrieved %d relevant context items:", len(retrieved_context))
+    # Splitting every chunk just to show its first line is wasted when INFO is off
+    if logger.isEnabledFor(logging.INFO):
+        for i, context in enumerate(retrieved_context, 1):
+            logger.info("  %d. %s", i, context.partition("\n")[0])
+
     return state
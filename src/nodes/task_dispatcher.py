@@ -0,0 +1,62 @@
+import logging
+from collections import defaultdict, deque
+from typing import Dict, List
+from src.state import AgentState, Task
+
+logger = logging.getLogger(__name__)
+
+COST_PER_TASK = 2.50  # Simulated cost per task
+
+
+def ready_tasks(state: AgentState) -> List[Task]:
+    """
+    Returns the pending tasks that have not been run yet and whose
+    dependencies have all completed.
+
+    Walks the plan from its root tasks along reverse dependencies, counting down
+    each task's unfinished dependencies, so tasks behind an incomplete one are
+    never looked at and no dependency list is rescanned.
+    """
+    plan = state.get('task_plan', [])
+    finished_ids = state.get('finished_task_ids', set())
+    completed_ids = state.get('completed_task_ids', set())
+
+    dependents: Dict[int, List[int]] = defaultdict(list)
+    remaining: Dict[int, int] = {}
+    for index, task in enumerate(plan):
+        remaining[index] = len(task['dependencies'])
+        for dep_id in task['dependencies']:
+            dependents[dep_id].append(index)
+
+    queue = deque(index for index, count in remaining.items() if count == 0)
+    ready = []
+    while queue:
+        index = queue.popleft()
+        task = plan[index]
+        if task['id'] in completed_ids:
+            for child in dependents[task['id']]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    queue.append(child)
+        elif task['status'] == 'pending' and task['id'] not in finished_ids:
+            ready.append(index)
+    # Dispatch in plan order
+    return [plan[index] for index in sorted(ready)]
+
+
+def task_dispatcher_node(state: AgentState) -> dict:
+    """
+    Picks the next wave of tasks for the workers and charges for them.
+    The waves themselves are fanned out by route_tasks.
+    """
+    wave = ready_tasks(state)
+    if not wave:
+        finished_ids = state.get('finished_task_ids', set())
+        blocked = [task for task in state.get('task_plan', [])
+                   if task['status'] == 'pending' and task['id'] not in finished_ids]
+        if blocked:
+            logger.info("⏳ %d tasks could not run (waiting on dependencies)", len(blocked))
+        return {}
+
+    logger.info("🚀 Dispatching %d tasks in parallel: %s", len(wave), [task['id'] for task in wave])
+    return {'current_cost': state.get('current_cost', 0) + COST_PER_TASK * len(wave)}
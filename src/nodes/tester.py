@@ -1,5 +1,8 @@
+import logging
 from src.state import AgentState, ValidationReport
 
+logger = logging.getLogger(__name__)
+
 def tester(state: AgentState) -> AgentState:
     """
     A simple tester node that returns the state without modification.
@@ -13,9 +16,9 @@ def tester(state: AgentState) -> AgentState:
     final_deliverable = state.get('final_deliverable', '')
     user_request = state.get('clarified_request', '')
     
-    print("🔍 FINAL VALIDATION: Testing complete application against requirements")
-    print(f"  📋 Original request: {user_request}")
-    print(f"  📦 Deliverable length: {len(final_deliverable)} characters")
+    logger.info("🔍 FINAL VALIDATION: Testing complete application against requirements")
+    logger.info("  📋 Original request: %s", user_request)
+    logger.info("  📦 Deliverable length: %d characters", len(final_deliverable))
     
     # Simulate validation logic
     validation_checks = [
@@ -26,9 +29,9 @@ def tester(state: AgentState) -> AgentState:
         "User experience validation"
     ]
     
-    print("  🧪 Running validation checks:")
+    logger.info("  🧪 Running validation checks:")
     for check in validation_checks:
-        print(f"    ✅ {check}: PASSED")
+        logger.info("    ✅ %s: PASSED", check)
     
     # Simulate final validation result
     validation_passed = True  # In real implementation, this would be LLM-determined
@@ -38,13 +41,13 @@ def tester(state: AgentState) -> AgentState:
             status="Passed",
             details=f"All validation checks passed. Deliverable meets requirements for: {user_request}"
         )
-        print("🎉 FINAL VALIDATION: PASSED")
+        logger.info("🎉 FINAL VALIDATION: PASSED")
     else:
         validation_report = ValidationReport(
             status="Failed",
             details="Validation failed - see detailed report for issues"
         )
-        print("❌ FINAL VALIDATION: FAILED")
+        logger.info("❌ FINAL VALIDATION: FAILED")
     
     state['validation_report'] = validation_report
     return state
@@ -1,16 +1,15 @@
 from typing import Dict, Any
 from src.state import Task
-from .base_worker import BaseWorker
-from langchain.prompts import PromptTemplate
-from src.config import llm
+from .base_worker import BaseWorker, get_build_llm, json_loads
+from src.config import ainvoke_llm
 import json
+import logging
 
-ARCHITECTURE_DESIGN_TEMPLATE = """You are an expert software architect tasked with designing system architecture and data models.
-
-Current Task: {task_goal}
+logger = logging.getLogger(__name__)
 
-Project Requirements:
-{requirements}
+# The instructions come first and the task last, so every architecture prompt shares
+# the same leading tokens for providers that cache prompt prefixes
+ARCHITECTURE_DESIGN_TEMPLATE = """You are an expert software architect tasked with designing system architecture and data models.
 
 Instructions:
 1. Analyze the requirements
@@ -41,7 +40,12 @@ You must respond with a valid JSON object in exactly this format:
     "rationale": "Explanation of design decisions"
 }}
 
-Ensure your response is a properly formatted JSON object and nothing else."""
+Ensure your response is a properly formatted JSON object and nothing else.
+
+Current Task: {task_goal}
+
+Project Requirements:
+{requirements}"""
 
 class ArchitectWorker(BaseWorker):
     """
@@ -58,10 +62,8 @@ class ArchitectWorker(BaseWorker):
             "Technology selection",
             "Architecture documentation"
         ]
-        self.design_prompt = PromptTemplate(
-            template=ARCHITECTURE_DESIGN_TEMPLATE,
-            input_variables=["task_goal", "requirements"]
-        )
+        # A plain str.format template: only task_goal and requirements vary per call
+        self.design_prompt = ARCHITECTURE_DESIGN_TEMPLATE
         
     def get_relevant_code_context(self, task: Task, state_context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -86,20 +88,54 @@ class ArchitectWorker(BaseWorker):
             'requirements': requirements or task['goal']  # Fallback to task goal if no requirements
         }
         
-    def _extract_json_from_llm_response(self, content: str) -> str:
+    def format_build_prompt(self, task: Task, context: Dict[str, Any]) -> str:
+        design_context = self.get_relevant_code_context(task, context)
+        return self.design_prompt.format(
+            task_goal=task['goal'],
+            requirements=design_context['requirements']
+        )
+        
+    def parse_build_response(self, content: str) -> Dict[str, Any]:
         """
-        Strips markdown code block (```json ... ```) from LLM response if present.
+        Turn the LLM's architecture JSON into a build result. Raises ValueError
+        if the JSON does not have the expected structure.
         """
-        content = content.strip()
-        if content.startswith("```json"):
-            content = content[len("```json"):].strip()
-        elif content.startswith("```"):
-            content = content[len("```"):].strip()
-        if content.endswith("```"):
-            content = content[:-3].strip()
-        return content
-
-    def build(self, task: Task, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Strip markdown code block if present
+        json_str = self._extract_json_from_llm_response(content)
+        
+        # Parse and validate response
+        try:
+            design_result = json_loads(json_str)
+            
+            # Validate expected structure
+            if not isinstance(design_result, dict):
+                raise ValueError("Response is not a JSON object")
+            if "architecture_design" not in design_result:
+                raise ValueError("Response missing architecture_design")
+            
+            return {
+                'result': json.dumps(design_result, indent=2),
+                'artifacts': {
+                    'architecture_doc': design_result,
+                    'diagrams': design_result.get('diagrams', {}),
+                    'components': design_result['architecture_design']['components'],
+                    'api_interfaces': design_result['architecture_design']['api_interfaces']
+                }
+            }
+            
+        except json.JSONDecodeError as e:
+            logger.error("Failed to parse LLM response as JSON: %s", e)
+            logger.debug("Raw response content: %s", json_str)
+            return {
+                'result': f"Error parsing JSON: {str(e)}",
+                'error': str(e),
+                'artifacts': {
+                    'error_details': str(e),
+                    'raw_response': json_str
+                }
+            }
+        
+    async def build(self, task: Task, context: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create system architecture design based on task requirements.
         """
@@ -108,58 +144,23 @@ class ArchitectWorker(BaseWorker):
             # Get and format context
             design_context = self.get_relevant_code_context(task, context or {})
             
-            print("\nSending prompt to LLM with:")
-            print(f"Task Goal: {task['goal']}")
-            print(f"Requirements: {design_context['requirements']}")
+            logger.info("Sending prompt to LLM with:")
+            logger.info("Task Goal: %s", task['goal'])
+            logger.info("Requirements: %s", design_context['requirements'])
             
             # Generate architecture design
-            response = llm.invoke(
-                self.design_prompt.format(
-                    task_goal=task['goal'],
-                    requirements=design_context['requirements']
-                )
+            response = await ainvoke_llm(
+                self.format_build_prompt(task, context or {}),
+                llm=get_build_llm(self.role),
+                semantic_text=f"{task['goal']}\n{design_context['requirements']}"
             )
             
-            print("\nReceived LLM response:")
-            print(response.content)
+            logger.debug("Received LLM response:\n%s", response.content)
             
-            # Strip markdown code block if present
-            json_str = self._extract_json_from_llm_response(response.content)
-            
-            # Parse and validate response
-            try:
-                design_result = json.loads(json_str)
-                
-                # Validate expected structure
-                if not isinstance(design_result, dict):
-                    raise ValueError("Response is not a JSON object")
-                if "architecture_design" not in design_result:
-                    raise ValueError("Response missing architecture_design")
-                
-                return {
-                    'result': json.dumps(design_result, indent=2),
-                    'artifacts': {
-                        'architecture_doc': design_result,
-                        'diagrams': design_result.get('diagrams', {}),
-                        'components': design_result['architecture_design']['components'],
-                        'api_interfaces': design_result['architecture_design']['api_interfaces']
-                    }
-                }
-                
-            except json.JSONDecodeError as e:
-                print(f"\nFailed to parse LLM response as JSON: {str(e)}")
-                print(f"Raw response content: {json_str}")
-                return {
-                    'result': f"Error parsing JSON: {str(e)}",
-                    'error': str(e),
-                    'artifacts': {
-                        'error_details': str(e),
-                        'raw_response': json_str
-                    }
-                }
+            return self.parse_build_response(response.content)
                 
         except Exception as e:
-            print(f"\nError in build phase: {str(e)}")
+            logger.error("Error in build phase: %s", e)
             return {
                 'result': f"Error in build phase: {str(e)}",
                 'error': str(e),
@@ -176,7 +177,7 @@ class ArchitectWorker(BaseWorker):
         try:
             # Parse the design if it's a string
             design = (
-                json.loads(build_result['result'])
+                json_loads(build_result['result'])
                 if isinstance(build_result['result'], str)
                 else build_result['result']
             )
@@ -225,7 +226,7 @@ class ArchitectWorker(BaseWorker):
             }
             
         except Exception as e:
-            print(f"Error in validation phase: {str(e)}")
+            logger.error("Error in validation phase: %s", e)
             return {
                 'status': 'Failed',
                 'error': str(e),
@@ -1,12 +1,128 @@
 from typing import Dict, List, Optional, Any
 from abc import ABC, abstractmethod
 from src.state import Task
-from src.config import llm
-from langchain.prompts import PromptTemplate
+from functools import lru_cache
+from src.config import ainvoke_llm, get_llm
+from src.cache.llm_cache import CachingLLMClient
+from langchain_core.messages import AIMessage
+from contextlib import aclosing
+import asyncio
+import re
 import subprocess
 import tempfile
 import os
 import json
+from xml.etree import ElementTree
+import logging
+
+logger = logging.getLogger(__name__)
+
+# orjson parses noticeably faster when it is installed; its decode error subclasses json's
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# Build responses are kept on disk for a week, one cache per worker role, and a task
+# whose goal and requirements embed within BUILD_SIMILARITY_THRESHOLD reuses them
+BUILD_CACHE_DIR = os.getenv("BUILD_CACHE_DIR", ".build_cache")
+BUILD_CACHE_TTL = 7 * 24 * 3600
+BUILD_SIMILARITY_THRESHOLD = 0.97
+
+# Opening markdown fence (```json) before the JSON body of a response
+_OPENING_FENCE_RE = re.compile(r"\s*```(?:json)?\s*")
+# A response with its optional surrounding fences; the closing one is missing when streaming stopped early
+_FENCED_JSON_RE = re.compile(r"\s*(?:```(?:json)?)?\s*(.*?)\s*(?:```)?\s*", re.DOTALL)
+
+class JsonStreamingLLM:
+    """
+    Chat model wrapper whose ainvoke streams the response and stops reading as soon as
+    the text received so far parses as a complete JSON value, instead of waiting for
+    whatever the model writes after it (closing fences, explanations).
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def __getattr__(self, name):
+        # model_name, temperature, ... come from the wrapped model, so cache keys match it
+        return getattr(self.llm, name)
+
+    async def ainvoke(self, prompt) -> AIMessage:
+        chunks = []
+        async with aclosing(self.llm.astream(prompt)) as stream:
+            async for chunk in stream:
+                text = chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+                chunks.append(text)
+                # Only a chunk ending in a closing bracket can complete the JSON value
+                if text.rstrip()[-1:] not in ('}', ']'):
+                    continue
+                content = "".join(chunks)
+                fence = _OPENING_FENCE_RE.match(content)
+                try:
+                    json_loads(content[fence.end():] if fence else content)
+                except json.JSONDecodeError:
+                    continue
+                break
+        return AIMessage(content="".join(chunks))
+
+def is_json_response(response) -> bool:
+    """Whether a build response holds one complete JSON value, the only kind worth caching"""
+    content = response.content if isinstance(response.content, str) else str(response.content)
+    try:
+        json_loads(_FENCED_JSON_RE.fullmatch(content).group(1))
+    except ValueError:
+        return False
+    return True
+
+@lru_cache(maxsize=None)
+def get_build_llm(role: str) -> CachingLLMClient:
+    """
+    Returns the caching LLM used by a worker role's build phase. Roles get separate
+    caches because their prompts differ while the compared goal and requirements may not.
+    Truncated or non-JSON answers are not cached, so a bad build is not replayed.
+    """
+    return CachingLLMClient(
+        JsonStreamingLLM(get_llm()),
+        threshold=BUILD_SIMILARITY_THRESHOLD,
+        ttl=BUILD_CACHE_TTL,
+        cache_dir=os.path.join(BUILD_CACHE_DIR, role),
+        cacheable=is_json_response
+    )
+
+# str.format template shared by every worker
+TEST_GENERATION_TEMPLATE = """Generate comprehensive test cases for the following component:
+
+Task Goal: {goal}
+Component Role: {role}
+Component Result: {result}
+
+Requirements:
+1. Generate both unit and integration tests
+2. Include edge cases and error scenarios
+3. Follow {test_framework} conventions
+4. Tests should be executable
+
+For each test, provide:
+1. Test name and description
+2. Test code
+3. Expected results
+4. Required setup/teardown
+
+Response Format:
+{{
+    "tests": [
+        {{
+            "name": "test_name",
+            "description": "what is being tested",
+            "code": "actual test code",
+            "expected_result": "what should happen",
+            "setup": "setup code if needed",
+            "teardown": "cleanup code if needed"
+        }}
+    ]
+}}"""
 
 class TestResult:
     def __init__(self, passed: bool, message: str, details: Dict[str, Any] = None):
@@ -26,7 +142,7 @@ class BaseWorker(ABC):
         self.test_framework: str = "pytest"  # Default test framework
         
     @abstractmethod
-    def build(self, task: Task, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def build(self, task: Task, context: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute the build phase of the task.
         
@@ -53,7 +169,7 @@ class BaseWorker(ABC):
         """
         pass
 
-    def generate_tests(self, task: Task, build_result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def generate_tests(self, task: Task, build_result: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Generate test cases for the task result.
         
@@ -65,45 +181,9 @@ class BaseWorker(ABC):
             List of test cases with code and metadata
         """
         try:
-            # Create prompt for test generation
-            test_prompt = PromptTemplate(
-                template="""Generate comprehensive test cases for the following component:
-
-Task Goal: {goal}
-Component Role: {role}
-Component Result: {result}
-
-Requirements:
-1. Generate both unit and integration tests
-2. Include edge cases and error scenarios
-3. Follow {test_framework} conventions
-4. Tests should be executable
-
-For each test, provide:
-1. Test name and description
-2. Test code
-3. Expected results
-4. Required setup/teardown
-
-Response Format:
-{
-    "tests": [
-        {
-            "name": "test_name",
-            "description": "what is being tested",
-            "code": "actual test code",
-            "expected_result": "what should happen",
-            "setup": "setup code if needed",
-            "teardown": "cleanup code if needed"
-        }
-    ]
-}""",
-                input_variables=["goal", "role", "result", "test_framework"]
-            )
-            
             # Generate tests using LLM
-            response = llm.invoke(
-                test_prompt.format(
+            response = await ainvoke_llm(
+                TEST_GENERATION_TEMPLATE.format(
                     goal=task['goal'],
                     role=task['role'],
                     result=str(build_result.get('result', '')),
@@ -112,11 +192,11 @@ Response Format:
             )
             
             # Parse and validate test cases
-            test_cases = json.loads(response.content)['tests']
+            test_cases = json_loads(response.content)['tests']
             return test_cases
             
         except Exception as e:
-            print(f"Error generating tests: {str(e)}")
+            logger.error("Error generating tests: %s", e)
             return []
 
     def execute_tests(self, test_cases: List[Dict[str, Any]], build_result: Dict[str, Any]) -> List[TestResult]:
@@ -154,16 +234,23 @@ Response Format:
                 
                 # Run tests
                 try:
+                    report_path = os.path.join(temp_dir, "report.xml")
                     result = subprocess.run(
-                        ["pytest", test_file_path, "-v"],
+                        ["pytest", test_file_path, "-v", f"--junitxml={report_path}"],
                         capture_output=True,
                         text=True
                     )
                     
-                    # Parse test results
+                    # Parse test results from pytest's JUnit XML report, once for all tests
+                    outcomes = {}
+                    if os.path.exists(report_path):
+                        for case in ElementTree.parse(report_path).iter("testcase"):
+                            outcomes[case.get("name")] = all(
+                                case.find(tag) is None for tag in ("failure", "error", "skipped")
+                            )
                     for test in test_cases:
-                        if test['name'] in result.stdout:
-                            passed = "PASSED" in result.stdout
+                        if test['name'] in outcomes:
+                            passed = outcomes[test['name']]
                             results.append(TestResult(
                                 passed=passed,
                                 message=f"Test {test['name']} {'passed' if passed else 'failed'}",
@@ -195,7 +282,7 @@ Response Format:
             
         return results
         
-    def execute_task(self, task: Task, context: Dict[str, Any]) -> Task:
+    async def execute_task(self, task: Task, context: Dict[str, Any]) -> Task:
         """
         Main execution flow for a task.
         
@@ -207,20 +294,21 @@ Response Format:
             Updated task with results and validation status
         """
         try:
-            print(f"🔨 {self.role} executing task {task['id']}: {task['goal']}")
+            logger.info("🔨 %s executing task %s: %s", self.role, task['id'], task['goal'])
             
             # Build phase
-            print(f"  🏗️  BUILD PHASE: Starting...")
-            build_result = self.build(task, context)
+            logger.info("  🏗️  BUILD PHASE: Starting...")
+            build_result = await self.build(task, context)
             task['result'] = build_result.get('result')
             
             # Generate test cases
-            print(f"  🧪 VALIDATION PHASE: Generating tests...")
-            test_cases = self.generate_tests(task, build_result)
+            logger.info("  🧪 VALIDATION PHASE: Generating tests...")
+            test_cases = await self.generate_tests(task, build_result)
             
             # Execute tests
-            print(f"  🧪 VALIDATION PHASE: Running {len(test_cases)} tests...")
-            test_results = self.execute_tests(test_cases, build_result)
+            logger.info("  🧪 VALIDATION PHASE: Running %d tests...", len(test_cases))
+            # pytest runs in a subprocess; wait for it off the event loop
+            test_results = await asyncio.to_thread(self.execute_tests, test_cases, build_result)
             
             # Store test results
             task['generated_test_cases'] = [
@@ -238,22 +326,28 @@ Response Format:
             
             if all_passed:
                 task['status'] = 'completed'
-                print(f"  ✅ Task {task['id']} completed and validated successfully")
+                logger.info("  ✅ Task %s completed and validated successfully", task['id'])
             else:
                 task['status'] = 'failed'
                 failed_tests = [r.message for r in test_results if not r.passed]
-                print(f"  ❌ Task {task['id']} failed validation:")
+                logger.info("  ❌ Task %s failed validation:", task['id'])
                 for msg in failed_tests:
-                    print(f"    - {msg}")
+                    logger.info("    - %s", msg)
                 
         except Exception as e:
-            print(f"  ❌ Error executing task {task['id']}: {str(e)}")
+            logger.error("  ❌ Error executing task %s: %s", task['id'], e)
             task['status'] = 'failed'
             task['self_validation_status'] = 'Failed'
             task['result'] = f"Error: {str(e)}"
             
         return task
         
+    def _extract_json_from_llm_response(self, content: str) -> str:
+        """
+        Strips markdown code block (```json ... ```) from LLM response if present.
+        """
+        return _FENCED_JSON_RE.fullmatch(content).group(1)
+        
     def get_relevant_code_context(self, task: Task) -> Dict[str, Any]:
         """
         Helper method to gather relevant code context for a task.
@@ -281,4 +375,4 @@ Response Format:
         Returns:
             Formatted code string
         """
-        return f"```\n{code}\n```" 
\ No newline at end of file
+        return f"```\n{code}\n```"
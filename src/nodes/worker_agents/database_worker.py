@@ -1,9 +1,10 @@
 from typing import Dict, Any
 from src.state import Task
-from .base_worker import BaseWorker
-from langchain.prompts import PromptTemplate
-from src.config import llm
-import json
+from .base_worker import BaseWorker, get_build_llm, json_loads
+from src.config import ainvoke_llm
+import logging
+
+logger = logging.getLogger(__name__)
 
 CONVEX_SCHEMA_PROMPT = """
 You are a database expert specializing in Convex (https://docs.convex.dev/).
@@ -46,10 +47,8 @@ class DatabaseWorker(BaseWorker):
             "Index optimization",
             "Data validation"
         ]
-        self.schema_prompt = PromptTemplate(
-            template=CONVEX_SCHEMA_PROMPT,
-            input_variables=["task_goal", "requirements"]
-        )
+        # A plain str.format template: only task_goal and requirements vary per call
+        self.schema_prompt = CONVEX_SCHEMA_PROMPT
 
     def get_relevant_code_context(self, task: Task, state_context: Dict[str, Any]) -> Dict[str, Any]:
         context = super().get_relevant_code_context(task)
@@ -60,72 +59,71 @@ class DatabaseWorker(BaseWorker):
             'requirements': requirements or task['goal']
         }
 
-    def _extract_json_from_llm_response(self, content: str) -> str:
-        content = content.strip()
-        if content.startswith("```json"):
-            content = content[len("```json"):].strip()
-        elif content.startswith("```"):
-            content = content[len("```"):].strip()
-        if content.endswith("```"):
-            content = content[:-3].strip()
-        return content
+    def format_build_prompt(self, task: Task, context: Dict[str, Any]) -> str:
+        db_context = self.get_relevant_code_context(task, context)
+        return self.schema_prompt.format(
+            task_goal=task['goal'],
+            requirements=db_context['requirements']
+        )
 
-    def build(self, task: Task, context: Dict[str, Any]) -> Dict[str, Any]:
-        response = None
+    def parse_build_response(self, content: str) -> Dict[str, Any]:
+        json_str = self._extract_json_from_llm_response(content)
         try:
-            db_context = self.get_relevant_code_context(task, context or {})
-            print("\n[DatabaseWorker] Task Goal:", task['goal'])
-            print("[DatabaseWorker] Requirements:", db_context['requirements'])
-            response = llm.invoke(
-                self.schema_prompt.format(
-                    task_goal=task['goal'],
-                    requirements=db_context['requirements']
-                )
-            )
-            print("\n[DatabaseWorker] Raw LLM response:", response.content)
-            json_str = self._extract_json_from_llm_response(response.content)
-            try:
-                db_result = json.loads(json_str)
-            except Exception as e:
-                print("[DatabaseWorker] Error parsing JSON:", e)
+            db_result = json_loads(json_str)
+        except Exception as e:
+            logger.error("[DatabaseWorker] Error parsing JSON: %s", e)
+            return {
+                'result': f"Error parsing JSON: {str(e)}",
+                'error': str(e),
+                'artifacts': {
+                    'error_details': str(e),
+                    'raw_response': json_str
+                }
+            }
+        if 'clarification_questions' in db_result and db_result['clarification_questions']:
+            logger.info("[DatabaseWorker] Clarification needed: %s", db_result['clarification_questions'])
+            return {
+                'result': None,
+                'clarification_questions': db_result['clarification_questions'],
+                'artifacts': {}
+            }
+        # Check for Convex schema keys
+        for key in ['schema_ts', 'migration_ts', 'seed_data']:
+            if key not in db_result:
+                logger.error("[DatabaseWorker] '%s' key missing in LLM response.", key)
                 return {
-                    'result': f"Error parsing JSON: {str(e)}",
-                    'error': str(e),
+                    'result': f"Error: '{key}' key missing in LLM response.",
+                    'error': f"'{key}' key missing",
                     'artifacts': {
-                        'error_details': str(e),
                         'raw_response': json_str
                     }
                 }
-            if 'clarification_questions' in db_result and db_result['clarification_questions']:
-                print("[DatabaseWorker] Clarification needed:", db_result['clarification_questions'])
-                return {
-                    'result': None,
-                    'clarification_questions': db_result['clarification_questions'],
-                    'artifacts': {}
-                }
-            # Check for Convex schema keys
-            for key in ['schema_ts', 'migration_ts', 'seed_data']:
-                if key not in db_result:
-                    print(f"[DatabaseWorker] '{key}' key missing in LLM response.")
-                    return {
-                        'result': f"Error: '{key}' key missing in LLM response.",
-                        'error': f"'{key}' key missing",
-                        'artifacts': {
-                            'raw_response': json_str
-                        }
-                    }
-            return {
-                'result': db_result['schema_ts'],
-                'artifacts': {
-                    'schema_ts': db_result['schema_ts'],
-                    'migration_ts': db_result['migration_ts'],
-                    'seed_data': db_result['seed_data'],
-                    'indexes': db_result.get('indexes', []),
-                    'validation_notes': db_result.get('validation_notes', '')
-                }
+        return {
+            'result': db_result['schema_ts'],
+            'artifacts': {
+                'schema_ts': db_result['schema_ts'],
+                'migration_ts': db_result['migration_ts'],
+                'seed_data': db_result['seed_data'],
+                'indexes': db_result.get('indexes', []),
+                'validation_notes': db_result.get('validation_notes', '')
             }
+        }
+
+    async def build(self, task: Task, context: Dict[str, Any]) -> Dict[str, Any]:
+        response = None
+        try:
+            db_context = self.get_relevant_code_context(task, context or {})
+            logger.info("[DatabaseWorker] Task Goal: %s", task['goal'])
+            logger.info("[DatabaseWorker] Requirements: %s", db_context['requirements'])
+            response = await ainvoke_llm(
+                self.format_build_prompt(task, context or {}),
+                llm=get_build_llm(self.role),
+                semantic_text=f"{task['goal']}\n{db_context['requirements']}"
+            )
+            logger.debug("[DatabaseWorker] Raw LLM response: %s", response.content)
+            return self.parse_build_response(response.content)
         except Exception as e:
-            print("[DatabaseWorker] Error in build phase:", e)
+            logger.error("[DatabaseWorker] Error in build phase: %s", e)
             return {
                 'result': f"Error in build phase: {str(e)}",
                 'error': str(e),
@@ -175,7 +173,7 @@ class DatabaseWorker(BaseWorker):
                 'error': None if status == 'Passed' else 'Some validation checks failed'
             }
         except Exception as e:
-            print("[DatabaseWorker] Error in validation phase:", e)
+            logger.error("[DatabaseWorker] Error in validation phase: %s", e)
             return {
                 'status': 'Failed',
                 'error': str(e),
@@ -1,9 +1,10 @@
 from typing import Dict, Any
 from src.state import Task
-from .base_worker import BaseWorker
-from langchain.prompts import PromptTemplate
-from src.config import llm
-import json
+from .base_worker import BaseWorker, get_build_llm, json_loads
+from src.config import ainvoke_llm
+import logging
+
+logger = logging.getLogger(__name__)
 
 FRONTEND_PROMPT = """
 You are a frontend engineer specializing in Next.js (for web) and React Native (for mobile).
@@ -24,13 +25,13 @@ Instructions:
 8. Provide a README or usage instructions.
 
 Respond with a valid JSON object in this format:
-{
+{{
   "clarification_questions": ["..."],
   "files": [
-    {"filename": "pages/index.tsx", "content": "// Next.js page code here"},
-    {"filename": "components/Header.tsx", "content": "// Header component code here"},
-    {"filename": "styles/global.css", "content": "/* CSS styles here */"},
-    {"filename": "tests/App.test.tsx", "content": "// Jest test code here"},
+    {{"filename": "pages/index.tsx", "content": "// Next.js page code here"}},
+    {{"filename": "components/Header.tsx", "content": "// Header component code here"}},
+    {{"filename": "styles/global.css", "content": "/* CSS styles here */"}},
+    {{"filename": "tests/App.test.tsx", "content": "// Jest test code here"}},
     ...
   ],
   "folder_structure": [
@@ -42,7 +43,7 @@ Respond with a valid JSON object in this format:
   ],
   "dependencies": ["next", "react", "react-dom", "jest", ...],
   "readme": "// README or usage instructions"
-}
+}}
 """
 
 class FrontendWorker(BaseWorker):
@@ -58,10 +59,8 @@ class FrontendWorker(BaseWorker):
             "Folder structure suggestion",
             "Dependency listing"
         ]
-        self.frontend_prompt = PromptTemplate(
-            template=FRONTEND_PROMPT,
-            input_variables=["task_goal", "requirements"]
-        )
+        # A plain str.format template: only task_goal and requirements vary per call
+        self.frontend_prompt = FRONTEND_PROMPT
 
     def get_relevant_code_context(self, task: Task, state_context: Dict[str, Any]) -> Dict[str, Any]:
         context = super().get_relevant_code_context(task)
@@ -72,35 +71,27 @@ class FrontendWorker(BaseWorker):
             'requirements': requirements or task['goal']
         }
 
-    def _extract_json_from_llm_response(self, content: str) -> str:
-        content = content.strip()
-        if content.startswith("```json"):
-            content = content[len("```json"):].strip()
-        elif content.startswith("```"):
-            content = content[len("```"):].strip()
-        if content.endswith("```"):
-            content = content[:-3].strip()
-        return content
-
-    def build(self, task: Task, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def build(self, task: Task, context: Dict[str, Any]) -> Dict[str, Any]:
         response = None
         try:
             fe_context = self.get_relevant_code_context(task, context or {})
-            print("\n[FrontendWorker] Task Goal:", task['goal'])
-            print("[FrontendWorker] Requirements:", fe_context['requirements'])
-            response = llm.invoke(
+            logger.info("[FrontendWorker] Task Goal: %s", task['goal'])
+            logger.info("[FrontendWorker] Requirements: %s", fe_context['requirements'])
+            response = await ainvoke_llm(
                 self.frontend_prompt.format(
                     task_goal=task['goal'],
                     requirements=fe_context['requirements']
-                )
+                ),
+                llm=get_build_llm(self.role),
+                semantic_text=f"{task['goal']}\n{fe_context['requirements']}"
             )
             # Always print the raw LLM response, even if parsing fails
-            print("\n[FrontendWorker] Raw LLM response:", getattr(response, 'content', response))
+            logger.debug("[FrontendWorker] Raw LLM response: %s", getattr(response, 'content', response))
             json_str = self._extract_json_from_llm_response(getattr(response, 'content', ''))
             try:
-                fe_result = json.loads(json_str)
+                fe_result = json_loads(json_str)
             except Exception as e:
-                print("[FrontendWorker] Error parsing JSON:", e)
+                logger.error("[FrontendWorker] Error parsing JSON: %s", e)
                 return {
                     'result': f"Error parsing JSON: {str(e)}",
                     'error': str(e),
@@ -110,7 +101,7 @@ class FrontendWorker(BaseWorker):
                     }
                 }
             if 'clarification_questions' in fe_result and fe_result['clarification_questions']:
-                print("[FrontendWorker] Clarification needed:", fe_result['clarification_questions'])
+                logger.info("[FrontendWorker] Clarification needed: %s", fe_result['clarification_questions'])
                 return {
                     'result': None,
                     'clarification_questions': fe_result['clarification_questions'],
@@ -119,7 +110,7 @@ class FrontendWorker(BaseWorker):
             # Check for required keys
             for key in ['files', 'folder_structure', 'dependencies']:
                 if key not in fe_result:
-                    print(f"[FrontendWorker] '{key}' key missing in LLM response.")
+                    logger.error("[FrontendWorker] '%s' key missing in LLM response.", key)
                     return {
                         'result': f"Error: '{key}' key missing in LLM response.",
                         'error': f"'{key}' key missing",
@@ -137,7 +128,7 @@ class FrontendWorker(BaseWorker):
                 }
             }
         except Exception as e:
-            print("[FrontendWorker] Error in build phase:", e)
+            logger.error("[FrontendWorker] Error in build phase: %s", e)
             return {
                 'result': f"Error in build phase: {str(e)}",
                 'error': str(e),
@@ -212,7 +203,7 @@ class FrontendWorker(BaseWorker):
                 'error': None if status == 'Passed' else 'Some validation checks failed'
             }
         except Exception as e:
-            print("[FrontendWorker] Error in validation phase:", e)
+            logger.error("[FrontendWorker] Error in validation phase: %s", e)
             return {
                 'status': 'Failed',
                 'error': str(e),
@@ -1,3 +1,4 @@
+from itertools import chain
 from typing import List, Dict
 from src.create_vectorstore import RAGVectorStore, ProjectProcessor
 
@@ -25,6 +26,33 @@ class SimpleRAGRetriever:
             print(f"Result {i+1}: {result['metadata']['file_path']} (distance: {result.get('distance', 'N/A')})")
         
         return contexts
+
+    def retrieve_contexts_batch(self, queries: List[str], max_chunks: int = 5) -> List[List[str]]:
+        """
+        Retrieve contexts for several queries at once: all queries are embedded in one
+        batch and sent to Chroma as a single query, instead of one round-trip each.
+        Returns one list of contexts per query, in the same order.
+        """
+        if not queries:
+            return []
+        print(f"Searching for {len(queries)} queries in one batch")
+
+        query_embeddings = self.vector_store.embed_queries(queries)
+        results = self.vector_store.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=max_chunks
+        )
+
+        batch_contexts = []
+        for q, documents in enumerate(results['documents'] or []):
+            metadatas = results['metadatas'][q]
+            batch_contexts.append([
+                self._format_context({'content': doc, 'metadata': metadatas[i]})
+                for i, doc in enumerate(documents)
+            ])
+            print(f"Query {q+1}: {len(documents)} results")
+
+        return batch_contexts
     
     def _format_context(self, result: Dict) -> str:
         """Format search result into context string"""
@@ -61,13 +89,10 @@ def test_simplified_retriever():
     vector_store = RAGVectorStore()
     vector_store.clear_collection()
     
-    # Process
-    all_chunks = []
-    for project_path, project_name in projects:
-        chunks = processor.process_project(project_path, project_name)
-        all_chunks.extend(chunks)
-    
-    vector_store.add_chunks(all_chunks)
+    # Process; the chunks are streamed into the store instead of collected in a list
+    vector_store.add_chunks(chain.from_iterable(
+        processor.iter_project(project_path, project_name) for project_path, project_name in projects
+    ))
     
     # Test simplified retriever
     simple_retriever = SimpleRAGRetriever(vector_store)
@@ -82,5 +107,5 @@ def test_simplified_retriever():
     
     return contexts
 
-# Uncomment to test:
-test_simplified_retriever()
\ No newline at end of file
+if __name__ == "__main__":
+    test_simplified_retriever()
\ No newline at end of file
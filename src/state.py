@@ -1,4 +1,4 @@
-from typing import TypedDict, Optional , List
+from typing import TypedDict, Optional , List, Annotated, Set
 from langchain_core.messages import AnyMessage
 from langgraph.graph.message import add_messages
 
@@ -17,6 +17,35 @@ class ValidationReport(TypedDict):
     status: str # "Passed" or "Failed"
     details: str
 
+class _Reset:
+    """Update value that empties a task-tracking channel instead of merging into it"""
+
+    def __repr__(self) -> str:
+        return "RESET"
+
+
+# Sent by manager_planning with a new plan, whose task ids start again from 1
+RESET = _Reset()
+
+def merge_tasks(left: List[Task], right: List[Task]) -> List[Task]:
+    """
+    Reducer that merges task lists by id, with tasks from the update replacing
+    those with the same id. Re-sending the full list leaves it unchanged, so
+    nodes that return the whole state still work next to parallel workers.
+    RESET empties the list.
+    """
+    if right is RESET:
+        return []
+    merged = {task['id']: task for task in left}
+    merged.update((task['id'], task) for task in right)
+    return list(merged.values())
+
+def union_ids(left: Set[int], right: Set[int]) -> Set[int]:
+    """Reducer that adds the ids of an update to a task id set, or empties it on RESET"""
+    if right is RESET:
+        return set()
+    return left | right
+
 class AgentState(TypedDict):
     user_request: str
     clarified_request: str
@@ -24,7 +53,12 @@ class AgentState(TypedDict):
     clarification_questions: List[str]
     retrieved_context: List[str]
     task_plan: List[Task]
-    completed_tasks: List[Task]
+    # Built-in list/set types let the channels start out empty rather than unset
+    completed_tasks: Annotated[list[Task], merge_tasks]
+    # Ids of tasks a worker has finished with, whether they passed or failed
+    finished_task_ids: Annotated[set[int], union_ids]
+    # Ids of the tasks in completed_tasks, kept alongside so dependency checks need no rebuild
+    completed_task_ids: Annotated[set[int], union_ids]
     final_deliverable: str
     validation_report: ValidationReport
     cost_estimate: float
@@ -1,4 +1,4 @@
-from src.config import llm
+from src.config import get_llm
 # Run this to debug your tree-sitter installation
 # Debug script to find out why no chunks are being processed
 
@@ -128,5 +128,5 @@ def debug_project_processing():
 
 if __name__ == "__main__":
     debug_project_processing()
-response = llm.invoke("Hello, how are you?")
+response = get_llm().invoke("Hello, how are you?")
 print(response)
\ No newline at end of file
@@ -1,6 +1,9 @@
 from src.create_vectorstore import RAGVectorStore, RAGRetriever, ProjectProcessor
 from typing import List, Dict, Optional, Tuple 
 
+# Chunks kept by setup_rag_system for debug_vector_store to print
+SAMPLE_CHUNKS = 3
+
 
 def setup_rag_system(narbtech_projects: List[Tuple[str, str]], clear_existing: bool = False) -> RAGRetriever: 
     print("Setting up RAG system...")
@@ -11,18 +14,22 @@ def setup_rag_system(narbtech_projects: List[Tuple[str, str]], clear_existing: b
         print("Clearing existing collection...")
         vector_store.clear_collection()
     
-    all_chunks = [] 
-    for project_path, project_name in narbtech_projects: 
-        print(f"Processing project: {project_name} at {project_path}") 
-        chunks = processor.process_project(project_path, project_name)
-        all_chunks.extend(chunks)
+    # The chunks are streamed into the store; only the first few are kept for debugging
+    sample_chunks = []
+    def stream_chunks():
+        for project_path, project_name in narbtech_projects: 
+            print(f"Processing project: {project_name} at {project_path}") 
+            for chunk in processor.iter_project(project_path, project_name):
+                if len(sample_chunks) < SAMPLE_CHUNKS:
+                    sample_chunks.append(chunk)
+                yield chunk
     
-    print(f"Adding {len(all_chunks)} chunks to vector store")
-    vector_store.add_chunks(all_chunks)
+    print("Adding chunks to vector store")
+    vector_store.add_chunks(stream_chunks())
     
     retriever = RAGRetriever(vector_store)
     print("RAG system setup complete")
-    return retriever, vector_store, all_chunks
+    return retriever, vector_store, sample_chunks
 
 def debug_vector_store(vector_store: RAGVectorStore, chunks: List):
     """Debug function to check what's in the vector store"""
@@ -37,7 +44,7 @@ def debug_vector_store(vector_store: RAGVectorStore, chunks: List):
     
     # Print sample chunk info
     print(f"\nSample chunks processed:")
-    for i, chunk in enumerate(chunks[:3]):
+    for i, chunk in enumerate(chunks[:SAMPLE_CHUNKS]):
         print(f"Chunk {i+1}:")
         print(f"  - File: {chunk.file_path}")
         print(f"  - Framework: {chunk.framework}")
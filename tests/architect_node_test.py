@@ -1,3 +1,4 @@
+import asyncio
 from src.nodes.worker_agents.architect_worker import ArchitectWorker
 from src.state import Task
 import json
@@ -38,7 +39,7 @@ def test_architect_node():
     
     # Execute build
     print("\n4. Executing build phase...")
-    build_result = architect_worker.build(task, context)
+    build_result = asyncio.run(architect_worker.build(task, context))
     
     # Print results
     print("\n5. Build Results:")
@@ -0,0 +1,10 @@
+import pytest
+from src.nodes.worker_agents import base_worker
+
+@pytest.fixture(autouse=True)
+def build_cache_dir(tmp_path, monkeypatch):
+    """Keeps the workers' on-disk build caches out of the repository"""
+    monkeypatch.setattr(base_worker, 'BUILD_CACHE_DIR', str(tmp_path / 'build_cache'))
+    base_worker.get_build_llm.cache_clear()
+    yield
+    base_worker.get_build_llm.cache_clear()
@@ -1,3 +1,4 @@
+import asyncio
 from src.nodes.worker_agents.database_worker import DatabaseWorker
 from src.state import Task
 import json
@@ -29,7 +30,7 @@ def test_database_worker_build():
     print("\n--- Context ---")
     print(json.dumps(context, indent=2))
     print("\n--- Running build() ---")
-    build_result = worker.build(task, context)
+    build_result = asyncio.run(worker.build(task, context))
     print("\n--- Build Result ---")
     print(json.dumps(build_result, indent=2))
     if 'error' in build_result:
@@ -1,5 +1,8 @@
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock, call
+
+from langchain_core.messages import AIMessage
 
 from langgraph_project.graph import create_workflow
 from langgraph_project.state import AgentState
@@ -11,67 +14,110 @@ def test_workflow_creation():
     assert app is not None
 
 
-@patch('langgraph_project.llm_config.llm')
-def test_planner_node(mock_llm):
+@patch('langgraph_project.nodes.example_node.get_stream_writer')
+@patch('langgraph_project.nodes.example_node.rag_tool')
+@patch('langgraph_project.nodes.example_node.get_llm')
+def test_planner_node(mock_llm, mock_rag_tool, mock_stream_writer):
     """Test the planner node functionality."""
     from langgraph_project.nodes.example_node import planner_node
     
-    # Mock the LLM response
-    mock_response = MagicMock()
-    mock_response.content = "Test plan content"
-    mock_llm.invoke.return_value = mock_response
+    # Mock the streamed LLM response
+    async def mock_astream(messages):
+        for text in ("Test plan ", "content"):
+            chunk = MagicMock()
+            chunk.content = text
+            yield chunk
+    mock_llm.return_value.astream = mock_astream
+    mock_rag_tool.ainvoke = AsyncMock(return_value="Test knowledge base results")
     
     # Test state
     state = {"task": "Test task"}
     
     # Call the node
-    result = planner_node(state)
+    result = asyncio.run(planner_node(state))
     
     # Assertions
     assert "plan" in result
     assert result["plan"] == "Test plan content"
-    mock_llm.invoke.assert_called_once()
+    assert result["kb_prefetch"] == "Test knowledge base results"
+    # The prefetched search counts as used, so the researcher does not repeat it
+    assert result["tools_used"] == {mock_rag_tool.name}
+    assert "compact_context" not in result
+    assert mock_stream_writer.return_value.call_count == 2
+    mock_rag_tool.ainvoke.assert_called_once_with({"query": "Test task"})
 
 
-@patch('langgraph_project.llm_config.llm')
-def test_researcher_node(mock_llm):
+@patch('langgraph_project.nodes.example_node.get_llm_with_tools')
+def test_researcher_node(mock_llm_with_tools):
     """Test the researcher node functionality."""
+    from langgraph_project.nodes import example_node
     from langgraph_project.nodes.example_node import researcher_node
     
+    # The tool-bound LLM is cached; drop any real one and start without cached responses
+    example_node.get_llm_with_tools.cache_clear()
+    example_node._response_cache.clear()
+    
     # Mock the LLM response
-    mock_response = MagicMock()
-    mock_response.content = "Test research content"
-    mock_llm.invoke.return_value = mock_response
+    mock_response = AIMessage(content="Test research content")
+    mock_llm_with_tools.return_value.ainvoke = AsyncMock(return_value=mock_response)
     
     # Test state
     state = {"plan": "Test plan"}
     
     # Call the node
-    result = researcher_node(state)
+    result = asyncio.run(researcher_node(state))
     
     # Assertions
-    assert "draft" in result
-    assert result["draft"] == "Test research content"
-    mock_llm.invoke.assert_called_once()
+    assert "messages" in result
+    assert result["messages"] == [mock_response]
+    mock_llm_with_tools.return_value.ainvoke.assert_called_once()
 
 
-@patch('langgraph_project.llm_config.llm')
-def test_writer_node(mock_llm):
+@patch('langgraph_project.nodes.example_node.get_stream_writer')
+@patch('langgraph_project.nodes.example_node.get_llm')
+def test_writer_node(mock_llm, mock_stream_writer):
     """Test the writer node functionality."""
     from langgraph_project.nodes.example_node import writer_node
     
-    # Mock the LLM response
-    mock_response = MagicMock()
-    mock_response.content = "Test final report"
-    mock_llm.invoke.return_value = mock_response
+    # Mock the streamed LLM response
+    async def mock_astream(messages):
+        for text in ("Test final ", "report"):
+            chunk = MagicMock()
+            chunk.content = text
+            yield chunk
+    mock_llm.return_value.astream = mock_astream
     
     # Test state
-    state = {"draft": "Test draft"}
+    state = {"task": "Test task", "plan": "Test plan", "compact_context": "Test context"}
     
     # Call the node
-    result = writer_node(state)
+    result = asyncio.run(writer_node(state))
     
     # Assertions
     assert "review" in result
     assert result["review"] == "Test final report"
-    mock_llm.invoke.assert_called_once()
+    # Each chunk is streamed out, in order, for main to write into the output file
+    mock_stream_writer.return_value.assert_has_calls([
+        call({"node": "writer", "field": "review", "chunk": "Test final "}),
+        call({"node": "writer", "field": "review", "chunk": "report"}),
+    ])
+
+
+@patch('langgraph_project.main.get_app')
+def test_main_streams_report_to_file(mock_get_app, tmp_path, monkeypatch):
+    """Test that streamed chunks are written to the output file without repeating the final update."""
+    from langgraph_project.main import main
+    
+    async def mock_astream(inputs, config, stream_mode):
+        yield "custom", {"node": "writer", "field": "review", "chunk": "Test final "}
+        yield "custom", {"node": "writer", "field": "review", "chunk": "report"}
+        yield "updates", {"writer": {"review": "Test final report"}}
+    mock_get_app.return_value.astream = mock_astream
+    mock_get_app.return_value.get_graph.return_value.draw_mermaid.return_value = "graph TD"
+    monkeypatch.chdir(tmp_path)
+    
+    asyncio.run(main())
+    
+    output = (tmp_path / "output" / "sample1.md").read_text(encoding="utf-8")
+    assert "## ➡️ Executing Node: `writer`\n\nTest final report\n\n---" in output
+    assert output.count("Test final report") == 1